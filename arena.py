@@ -0,0 +1,193 @@
+"""Headless AI-vs-AI arena: batch self-play between engine configurations.
+
+Every pair of engines plays --games games across a process pool. Games come
+in pairs that share a short random opening with the colours swapped, so
+deterministic engines still produce varied games. Each finished game is
+appended to a JSON Lines file as it completes, and a summary of score,
+win rate and Elo difference (with 95% confidence intervals) is printed at
+the end.
+
+    python arena.py --engine beginner --engine "name=deep,depth=6,time_ms=300" --games 200
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import combinations
+
+from board_state import COLOR_NAMES, DEFAULT_WEIGHTS, BoardState
+from opening_book import OpeningBook
+from pdn import move_text
+from search import DIFFICULTY_DEPTHS, DIFFICULTY_TIME_BUDGETS, MAX_DEPTH, Searcher
+
+Z_95 = 1.96
+
+
+def parse_engine(spec):
+    """Turn "master" or "name=x,preset=master,depth=6,time_ms=500,king=170,..." into an engine config.
+
+    Evaluation weights are given by their DEFAULT_WEIGHTS names. Besides
+    those, a config may name a tablebase and an opening book file. Searches
+    get the master preset's time budget unless the config sets one.
+    """
+    config = {"depth": MAX_DEPTH, "time_ms": DIFFICULTY_TIME_BUDGETS["master"], "weights": {}, "tablebase": None,
+              "book": None}
+    for item in spec.split(","):
+        key, _, value = item.partition("=")
+        key = key.strip()
+        if not value:
+            key, value = "preset", key
+        if key == "preset":
+            if value not in DIFFICULTY_DEPTHS:
+                raise ValueError(f"unknown difficulty preset {value!r}")
+            config["depth"] = DIFFICULTY_DEPTHS[value]
+            config["time_ms"] = DIFFICULTY_TIME_BUDGETS[value]
+            config.setdefault("name", value)
+        elif key in ("depth", "time_ms"):
+            config[key] = int(value)
+        elif key in DEFAULT_WEIGHTS:
+            config["weights"][key] = int(value)
+        elif key in ("name", "tablebase", "book"):
+            config[key] = value
+        else:
+            raise ValueError(f"unknown engine setting {key!r}")
+    config.setdefault("name", spec)
+    return config
+
+
+_searchers = {}  # Per worker process: engine name -> Searcher, kept warm across games
+_books = {}
+
+
+def _engine_move(config, state, rng):
+    name = config["name"]
+    if config["book"]:
+        if name not in _books:
+            _books[name] = OpeningBook(config["book"])
+        move = _books[name].choose(state, rng)
+        if move is not None:
+            return move
+    if name not in _searchers:
+        weights = dict(DEFAULT_WEIGHTS, **config["weights"]) if config["weights"] else None
+        _searchers[name] = Searcher(weights=weights, tablebase_path=config["tablebase"])
+    return _searchers[name].search(state, config["depth"], config["time_ms"])
+
+
+def play_game(game, red, green, opening_seed, opening_plies, max_plies):
+    """Play one game between two engine configs and return its result record."""
+    rng = random.Random(opening_seed)
+    state = BoardState()
+    engines = (red, green)
+    moves = []
+    started = time.perf_counter()
+    while len(moves) < max_plies:
+        legal = state.legal_moves()
+        if not legal:
+            break
+        if len(moves) < opening_plies:
+            move = rng.choice(legal)
+        else:
+            move = _engine_move(engines[state.turn], state, rng)
+        state.make_move(move)
+        moves.append(move)
+    winner = state.winner()
+    return {
+        "game": game,
+        "red": red["name"],
+        "green": green["name"],
+        "result": COLOR_NAMES[winner] if winner is not None else "draw",
+        "plies": len(moves),
+        "moves": [move_text(move) for move in moves],
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def schedule(engines, games, seed):
+    """Yield play_game argument tuples: games per pair, colours swapped on each shared opening."""
+    game = 0
+    for first, second in combinations(engines, 2):
+        for i in range(games):
+            opening_seed = seed * 1_000_003 + i // 2  # Every pair of engines sees the same openings
+            red, green = (first, second) if i % 2 == 0 else (second, first)
+            yield game, red, green, opening_seed
+            game += 1
+
+
+def summarise(records, first, second):
+    """Return the score of first against second with a 95% interval, as win rate and Elo."""
+    wins = losses = draws = 0
+    for record in records:
+        if {record["red"], record["green"]} != {first, second}:
+            continue
+        if record["result"] == "draw":
+            draws += 1
+        elif record[record["result"]] == first:
+            wins += 1
+        else:
+            losses += 1
+    games = wins + losses + draws
+    summary = {"engine": first, "opponent": second, "games": games, "wins": wins, "losses": losses, "draws": draws}
+    if not games:
+        return summary
+    score = (wins + draws / 2) / games
+    # Normal approximation using the per-game score variance
+    variance = (wins * (1 - score) ** 2 + losses * score ** 2 + draws * (0.5 - score) ** 2) / games
+    margin = Z_95 * math.sqrt(variance / games)
+    summary["score"] = round(score, 4)
+    summary["score_interval"] = [round(max(score - margin, 0.0), 4), round(min(score + margin, 1.0), 4)]
+    summary["elo"] = _elo(score)
+    summary["elo_interval"] = [_elo(score - margin), _elo(score + margin)]
+    return summary
+
+
+def _elo(score):
+    if score <= 0 or score >= 1:
+        return None  # Unbounded: one side scored everything
+    return round(-400 * math.log10(1 / score - 1), 1)
+
+
+def run(engines, games, workers, output, seed=0, opening_plies=4, max_plies=200, log=print):
+    """Play the whole schedule across a process pool, streaming each result to output."""
+    records = []
+    with ProcessPoolExecutor(workers) as pool, open(output, "a") as out:
+        futures = [pool.submit(play_game, game, red, green, opening_seed, opening_plies, max_plies)
+                   for game, red, green, opening_seed in schedule(engines, games, seed)]
+        for done, future in enumerate(as_completed(futures), 1):
+            record = future.result()
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            records.append(record)
+            if done % 10 == 0 or done == len(futures):
+                log(f"{done}/{len(futures)} games")
+    return [summarise(records, first["name"], second["name"]) for first, second in combinations(engines, 2)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play engine configurations against each other without the GUI.")
+    parser.add_argument("--engine", action="append", required=True,
+                        help="a difficulty preset or name=..,preset=..,depth=..,time_ms=..,<weight>=..; "
+                             "give at least two")
+    parser.add_argument("--games", type=int, default=100, help="games per pair of engines")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--output", default="arena.jsonl", help="JSON Lines file the games are appended to")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the random openings")
+    parser.add_argument("--opening-plies", type=int, default=4, help="random plies played before the engines take over")
+    parser.add_argument("--max-plies", type=int, default=200, help="games this long are scored as draws")
+    args = parser.parse_args(argv)
+
+    engines = [parse_engine(spec) for spec in args.engine]
+    names = [engine["name"] for engine in engines]
+    if len(engines) < 2 or len(set(names)) != len(names):
+        parser.error("give at least two engines, each with a different name")
+    summaries = run(engines, args.games, args.workers, args.output, args.seed, args.opening_plies, args.max_plies,
+                    log=lambda message: print(message, file=sys.stderr))
+    for summary in summaries:
+        print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""Benchmarks for move generation, search and board rendering on fixed positions.
+
+    python benchmark.py --output results.json
+    python benchmark.py --baseline results.json --threshold 0.10
+
+Every metric is written to JSON with its unit and whether higher or lower
+is better. With --baseline, each metric is compared against the saved
+value and the run fails (exit status 1) if any got worse by more than the
+threshold. Timings take the best of --repeat runs to keep noise down.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+
+from board_state import BoardState, PositionCache
+from search import DIFFICULTY_DEPTHS, DIFFICULTY_TIME_BUDGETS, MAX_DEPTH, Searcher
+
+# Encoded (red, green, kings, turn) test positions; none of them may change, or old baselines stop meaning anything
+POSITIONS = {
+    "start": (0x00000FFF, 0xFFF00000, 0x0, 0),
+    "opening_capture": (0x00000DFB, 0xF8B28000, 0x0, 0),
+    "midgame": (0x0002A066, 0xD5600008, 0x8, 0),
+    "late_midgame": (0x00000D89, 0xF4040000, 0x0, 0),  # Six men a side, level to depth 15
+    "king_endgame": (0x00040000, 0x00003090, 0x40080, 0),
+}
+
+
+def _best_of(repeat, run):
+    # Best wall time of repeat calls to run()
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_movegen(repeat, calls=2000):
+    """Uncached legal move generation, in calls per second per position."""
+    results = {}
+    for name, encoded in POSITIONS.items():
+        state = BoardState.decode(encoded)
+
+        def run():
+            for _ in range(calls):
+                state.generate_moves()
+        results[f"movegen.{name}"] = {"value": round(calls / _best_of(repeat, run)), "unit": "calls/s",
+                                      "better": "higher"}
+    return results
+
+
+def bench_search(repeat, difficulties=None):
+    """Time and nodes for a fresh search of every position at each difficulty level."""
+    results = {}
+    for difficulty in difficulties or DIFFICULTY_DEPTHS:
+        depth, time_ms = DIFFICULTY_DEPTHS[difficulty], DIFFICULTY_TIME_BUDGETS[difficulty]
+        total_seconds = 0.0
+        total_nodes = 0
+        for encoded in POSITIONS.values():
+            best = None
+            for _ in range(repeat):
+                searcher = Searcher()  # Cold tables, so runs are comparable
+                state = BoardState.decode(encoded)
+                started = time.perf_counter()
+                searcher.search(state, depth, time_ms)
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            total_seconds += best
+            total_nodes += searcher.nodes
+        # Levels without a depth cap run to their time budget, so only their speed is comparable
+        better = "lower" if depth < MAX_DEPTH else None
+        results[f"search.{difficulty}.ms"] = {"value": round(total_seconds * 1000, 1), "unit": "ms", "better": better}
+        results[f"search.{difficulty}.nodes"] = {"value": total_nodes, "unit": "nodes", "better": better}
+        results[f"search.{difficulty}.nodes_per_second"] = {
+            "value": round(total_nodes / total_seconds) if total_seconds else 0, "unit": "nodes/s", "better": "higher"}
+    return results
+
+
+def bench_render(repeat, rounds=20):
+    """draw_piece and highlight costs on a hidden Tk root; empty when no display is available."""
+    import tkinter as tk  # Only this group needs Tk
+    from checker_game import CheckerGame
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        print("skipping rendering benchmarks: no display", file=sys.stderr)
+        return {}
+    root.withdraw()
+    try:
+        game = CheckerGame(root, "red", "beginner")
+        states = [BoardState.decode(encoded) for encoded in POSITIONS.values()]
+        for state in states:
+            state.cache = PositionCache()
+
+        def redraw():
+            for _ in range(rounds):
+                for row_col, piece_info in game.pieces.items():
+                    game.draw_piece(*row_col, piece_info)
+                root.update_idletasks()
+
+        def switch_positions():
+            for _ in range(rounds):
+                for state in states:
+                    game.state = state
+                    game.sync_board()
+                    root.update_idletasks()
+
+        def highlight():
+            for _ in range(rounds):
+                for state in states:
+                    game.state = state
+                    game.show_hints()
+                    game.clear_highlights()
+                    root.update_idletasks()
+
+        draws = rounds * len(game.pieces)
+        results = {"render.draw_piece": {"value": round(_best_of(repeat, redraw) / draws * 1e6, 2),
+                                         "unit": "us/piece", "better": "lower"}}
+        syncs = rounds * len(states)
+        results["render.sync_board"] = {"value": round(_best_of(repeat, switch_positions) / syncs * 1e6, 1),
+                                        "unit": "us/position", "better": "lower"}
+        results["render.highlight"] = {"value": round(_best_of(repeat, highlight) / syncs * 1e6, 1),
+                                       "unit": "us/cycle", "better": "lower"}
+        return results
+    finally:
+        root.destroy()
+
+
+def compare(results, baseline, threshold):
+    """Return a line per metric that got worse than baseline by more than threshold (a fraction)."""
+    regressions = []
+    for name, metric in results.items():
+        old = baseline.get(name)
+        if old is None or not old["value"] or metric["better"] is None:
+            continue
+        change = (metric["value"] - old["value"]) / old["value"]
+        if metric["better"] == "higher":
+            change = -change
+        if change > threshold:
+            regressions.append(f"{name}: {old['value']} -> {metric['value']} {metric['unit']} ({change:+.0%} worse)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark move generation, search and rendering.")
+    parser.add_argument("--only", default="movegen,search,render", help="comma-separated benchmark groups")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per timing; the best one counts")
+    parser.add_argument("--output", help="write the results here as JSON (default: stdout)")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown, as a fraction")
+    args = parser.parse_args(argv)
+
+    groups = {"movegen": bench_movegen, "search": bench_search, "render": bench_render}
+    metrics = {}
+    for group in args.only.split(","):
+        metrics.update(groups[group](args.repeat))
+    results = {"python": platform.python_version(), "machine": platform.machine(), "metrics": metrics}
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["metrics"]
+        regressions = compare(metrics, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,455 @@
+import random
+import threading
+from collections import OrderedDict
+
+RED = 0
+GREEN = 1
+COLOR_NAMES = ("red", "green")
+
+# The 32 dark squares are numbered row by row from the top-left corner, so bit n
+# of a bitboard stands for square n (PDN square n + 1). Red starts on rows 0-2
+# and moves down the board, green starts on rows 5-7 and moves up.
+RED_START = 0x00000FFF
+GREEN_START = 0xFFF00000
+CROWN_ROWS = (7, 0)  # Row on which a red / green man is crowned
+
+
+def color_index(name):
+    return COLOR_NAMES.index(name)
+
+
+def square_to_rowcol(sq):
+    row = sq // 4
+    return row, 2 * (sq % 4) + (1 - row % 2)
+
+
+def rowcol_to_square(row, col):
+    """Return the square number of (row, col), or None for light or off-board squares."""
+    if not (0 <= row < 8 and 0 <= col < 8) or (row + col) % 2 == 0:
+        return None
+    return row * 4 + col // 2
+
+
+def iter_bits(bitboard):
+    while bitboard:
+        low = bitboard & -bitboard
+        yield low.bit_length() - 1
+        bitboard ^= low
+
+
+# Diagonal directions as (row step, col step): down-left, down-right, up-left, up-right
+DIRECTIONS = ((1, -1), (1, 1), (-1, -1), (-1, 1))
+DOWN_DIRECTIONS = (0, 1)
+UP_DIRECTIONS = (2, 3)
+MAN_DIRECTIONS = (DOWN_DIRECTIONS, UP_DIRECTIONS)  # Red men move down, green men up
+KING_DIRECTIONS = DOWN_DIRECTIONS + UP_DIRECTIONS
+FULL_BOARD = 0xFFFFFFFF
+
+
+def _shift(bitboard, amount):
+    return (bitboard << amount) & FULL_BOARD if amount > 0 else bitboard >> -amount
+
+
+def _build_tables():
+    # NEIGHBOUR[d][sq] / JUMP_LANDING[d][sq] are the squares one and two steps
+    # away from sq in direction d, or -1 off the board.
+    neighbour = [[-1] * 32 for _ in DIRECTIONS]
+    landing = [[-1] * 32 for _ in DIRECTIONS]
+    for sq in range(32):
+        row, col = square_to_rowcol(sq)
+        for d, (dx, dy) in enumerate(DIRECTIONS):
+            step = rowcol_to_square(row + dx, col + dy)
+            jump = rowcol_to_square(row + 2 * dx, col + 2 * dy)
+            neighbour[d][sq] = -1 if step is None else step
+            landing[d][sq] = -1 if jump is None else jump
+    return tuple(map(tuple, neighbour)), tuple(map(tuple, landing))
+
+
+NEIGHBOUR, JUMP_LANDING = _build_tables()
+JUMPED_SQUARE = {(sq, JUMP_LANDING[d][sq]): NEIGHBOUR[d][sq]
+                 for d in range(4) for sq in range(32) if JUMP_LANDING[d][sq] >= 0}
+
+
+def _step_masks(directions, jumps_only=False):
+    # Group the one-step moves in directions by how far the square number
+    # shifts, so a whole side can be moved with one shift and mask per group.
+    masks = {}
+    for d in directions:
+        for sq in range(32):
+            target = NEIGHBOUR[d][sq]
+            if target < 0 or (jumps_only and JUMP_LANDING[d][sq] < 0):
+                continue
+            masks[target - sq] = masks.get(target - sq, 0) | (1 << sq)
+    return tuple(sorted(masks.items()))
+
+
+DOWN_STEPS = _step_masks(DOWN_DIRECTIONS)
+UP_STEPS = _step_masks(UP_DIRECTIONS)
+STEP_SHIFTS = tuple(_step_masks((d,), jumps_only=True) for d in range(4))
+JUMP_SHIFTS = (7, 9, -9, -7)  # A jump in each direction always moves this many squares
+JUMP_MASKS = tuple(sum(1 << sq for sq in range(32) if JUMP_LANDING[d][sq] >= 0) for d in range(4))
+
+
+def _zobrist_keys():
+    # Fixed seed so hashes are stable across runs and processes
+    rng = random.Random(0x5EED)
+    pieces = tuple(tuple(rng.getrandbits(64) for _ in range(32)) for _ in range(4))
+    return pieces, rng.getrandbits(64)
+
+
+# ZOBRIST[color * 2 + is_king][sq], plus a key toggled whenever the turn passes
+ZOBRIST, ZOBRIST_TURN = _zobrist_keys()
+
+# Evaluation terms, in hundredths of a man
+DEFAULT_WEIGHTS = {
+    "man": 100,  # Material
+    "king": 160,
+    "advancement": 4,  # Per row a man has moved towards its crowning row
+    "centre": 6,  # For standing on the eight central squares
+    "back_rank": 12,  # For a man still guarding its own back row
+}
+CENTRE = sum(1 << sq for sq in range(32) if 2 <= sq // 4 <= 5 and 2 <= square_to_rowcol(sq)[1] <= 5)
+
+
+def build_piece_square_tables(weights=None):
+    """Return TABLES[color * 2 + is_king][sq], the value of that piece to its own side.
+
+    Every evaluation term depends only on a piece and its square, which is
+    what lets BoardState keep the evaluation up to date move by move.
+    """
+    weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+    tables = []
+    for color in (RED, GREEN):
+        men, kings = [], []
+        for sq in range(32):
+            row = sq // 4
+            advanced = row if color == RED else 7 - row
+            centre = weights["centre"] if CENTRE >> sq & 1 else 0
+            man = weights["man"] + weights["advancement"] * advanced + centre
+            if advanced == 0:
+                man += weights["back_rank"]
+            men.append(man)
+            kings.append(weights["king"] + centre)
+        tables.extend((tuple(men), tuple(kings)))
+    return tuple(tables)
+
+
+DEFAULT_TABLES = build_piece_square_tables()
+
+
+class PositionCache:
+    """LRU cache of what is known about a position, keyed by its Zobrist hash.
+
+    Each entry is (legal moves, has a capture, game over). BoardStates that
+    share a cache (copies do) share the answers, so the GUI's clicks, hints
+    and winner check ask the move generator about a position once. The search
+    keeps its own unlocked table instead (see Searcher.analyse).
+    """
+
+    def __init__(self, max_entries=50_000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()  # The GUI and the AI thread use the same cache
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, state):
+        key = state.hash
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry
+        entry = state.generate_analysis()
+        with self.lock:
+            self.misses += 1
+            self.entries[key] = entry
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class BoardState:
+    """A checkers position with no GUI attached.
+
+    Pieces are kept in three 32-bit bitboards (red, green and kings) plus the
+    colour to move. Moves are tuples of the squares a piece visits, so a
+    multi-jump is a single move from its first square to its last.
+    """
+
+    def __init__(self, red=RED_START, green=GREEN_START, kings=0, turn=RED, tables=DEFAULT_TABLES, cache=None):
+        self.red = red
+        self.green = green
+        self.kings = kings
+        self.turn = turn
+        self.hash = self.compute_hash()
+        self.tables = tables
+        self.score = self.compute_score()  # Evaluation from red's side, kept up to date by make/unmake
+        self.history = []  # Undo records pushed by make_move
+        self.cache = cache  # Optional PositionCache for legal-move and game-over queries
+
+    def copy(self):
+        clone = BoardState.__new__(BoardState)
+        clone.red, clone.green, clone.kings = self.red, self.green, self.kings
+        clone.turn, clone.hash = self.turn, self.hash
+        clone.tables, clone.score = self.tables, self.score
+        clone.history = []
+        clone.cache = self.cache
+        return clone
+
+    def use_tables(self, tables):
+        """Switch to other piece-square tables (e.g. other evaluation weights)."""
+        self.tables = tables
+        self.score = self.compute_score()
+
+    def compute_score(self):
+        """The evaluation from red's side, recomputed from scratch."""
+        score = 0
+        for color, sign in ((RED, 1), (GREEN, -1)):
+            for sq in iter_bits(self.pieces_of(color)):
+                score += sign * self.tables[color * 2 + (self.kings >> sq & 1)][sq]
+        return score
+
+    def evaluation(self):
+        """The evaluation from the side to move's point of view, in O(1)."""
+        return self.score if self.turn == RED else -self.score
+
+    def encode(self):
+        """Compact, picklable form of the position for handing to other processes."""
+        return self.red, self.green, self.kings, self.turn
+
+    @classmethod
+    def decode(cls, encoded):
+        return cls(*encoded)
+
+    def compute_hash(self):
+        """Zobrist hash of the position, recomputed from scratch."""
+        key = ZOBRIST_TURN if self.turn == GREEN else 0
+        for color in (RED, GREEN):
+            for sq in iter_bits(self.pieces_of(color)):
+                key ^= ZOBRIST[color * 2 + (self.kings >> sq & 1)][sq]
+        return key
+
+    def pieces_of(self, color):
+        return self.red if color == RED else self.green
+
+    def piece_at(self, sq):
+        """Return (color, is_king) for the piece on sq, or None if it is empty."""
+        bit = 1 << sq
+        if self.red & bit:
+            return RED, bool(self.kings & bit)
+        if self.green & bit:
+            return GREEN, bool(self.kings & bit)
+        return None
+
+    def pieces(self):
+        """Return the position as the {(row, col): {"color", "is_king"}} dict the GUI draws from."""
+        pieces = {}
+        for color in (RED, GREEN):
+            for sq in iter_bits(self.pieces_of(color)):
+                pieces[square_to_rowcol(sq)] = {"color": COLOR_NAMES[color],
+                                                 "is_king": bool(self.kings & (1 << sq))}
+        return pieces
+
+    def _movers(self, color):
+        # Bitboards of the pieces that step down and up the board for color
+        own = self.pieces_of(color)
+        kings = own & self.kings
+        return (own, kings) if color == RED else (kings, own)
+
+    def jumpers(self):
+        """Return the bitboard of pieces of the side to move that have a capture."""
+        down, up = self._movers(self.turn)
+        opponents = self.pieces_of(1 - self.turn)
+        empty = ~(self.red | self.green) & FULL_BOARD
+        found = 0
+        for movers, directions in ((down, DOWN_DIRECTIONS), (up, UP_DIRECTIONS)):
+            if not movers:
+                continue
+            for d in directions:
+                landing_shift = JUMP_SHIFTS[d]
+                can_land = _shift(empty, -landing_shift)
+                next_to_opponent = 0
+                for shift, mask in STEP_SHIFTS[d]:
+                    next_to_opponent |= mask & _shift(opponents, -shift)
+                found |= movers & JUMP_MASKS[d] & can_land & next_to_opponent
+        return found
+
+    def _jump_chains(self, path, directions, crown_row, opponents, empty, chains):
+        # Extend path by every available jump, appending the finished chains
+        sq = path[-1]
+        extended = False
+        for d in directions:
+            landing = JUMP_LANDING[d][sq]
+            if landing < 0 or not empty >> landing & 1:
+                continue
+            mid = NEIGHBOUR[d][sq]
+            if not opponents >> mid & 1:
+                continue
+            extended = True
+            next_path = path + (landing,)
+            if landing >> 2 == crown_row:
+                chains.append(next_path)  # Being crowned ends the move
+                continue
+            self._jump_chains(next_path, directions, crown_row, opponents & ~(1 << mid),
+                              empty & ~(1 << landing), chains)
+        if not extended and len(path) > 1:
+            chains.append(path)
+
+    def generate_moves(self):
+        """Generate the moves for the side to move; jumps are compulsory and come as complete chains."""
+        color = self.turn
+        empty = ~(self.red | self.green) & FULL_BOARD
+        jumpers = self.jumpers()
+        moves = []
+        if jumpers:
+            opponents = self.pieces_of(1 - color)
+            for sq in iter_bits(jumpers):
+                if self.kings >> sq & 1:
+                    directions, crown_row = KING_DIRECTIONS, -1
+                else:
+                    directions, crown_row = MAN_DIRECTIONS[color], CROWN_ROWS[color]
+                self._jump_chains((sq,), directions, crown_row, opponents, empty | (1 << sq), moves)
+            return moves
+
+        down, up = self._movers(color)
+        for movers, steps in ((down, DOWN_STEPS), (up, UP_STEPS)):
+            if not movers:
+                continue
+            for shift, mask in steps:
+                for target in iter_bits(_shift(movers & mask, shift) & empty):
+                    moves.append((target - shift, target))
+        return moves
+
+    def analyse(self):
+        """Return (legal moves, has a capture, game over), from the cache when there is one."""
+        if self.cache is not None:
+            return self.cache.lookup(self)
+        return self.generate_analysis()
+
+    def generate_analysis(self):
+        """Return (legal moves, has a capture, game over) straight from the move generator."""
+        moves = tuple(self.generate_moves())
+        return moves, bool(moves) and abs(moves[0][1] - moves[0][0]) > 5, not moves
+
+    def legal_moves(self):
+        return list(self.analyse()[0])
+
+    def has_captures(self):
+        return self.analyse()[1]
+
+    def make_move(self, move):
+        """Play move for the side to move and return the bitboard of captured squares.
+
+        An undo record (start, end, captured, captured kings, promoted, previous
+        hash, previous score) is pushed onto self.history so unmake_move can
+        take it back.
+        """
+        color = self.turn
+        start, end = move[0], move[-1]
+        captured = 0
+        for a, b in zip(move, move[1:]):
+            if abs(b - a) > 5:
+                captured |= 1 << JUMPED_SQUARE[a, b]
+
+        kings = self.kings
+        was_king = kings >> start & 1
+        captured_kings = kings & captured
+        # A man is crowned on the far row, or when it captures a king
+        promoted = not was_king and (end >> 2 == CROWN_ROWS[color] or bool(captured_kings))
+        self.history.append((start, end, captured, captured_kings, promoted, self.hash, self.score))
+
+        moved = (1 << start) ^ (1 << end)
+        if color == RED:
+            self.red ^= moved
+            self.green ^= captured
+        else:
+            self.green ^= moved
+            self.red ^= captured
+
+        tables = self.tables
+        before, after = color * 2 + was_king, color * 2 + (was_king or promoted)
+        key = self.hash ^ ZOBRIST_TURN ^ ZOBRIST[before][start] ^ ZOBRIST[after][end]
+        gain = tables[after][end] - tables[before][start]
+        for sq in iter_bits(captured):
+            piece = (1 - color) * 2 + (kings >> sq & 1)
+            key ^= ZOBRIST[piece][sq]
+            gain += tables[piece][sq]
+        self.hash = key
+        self.score += gain if color == RED else -gain
+
+        kings &= ~(captured | (1 << start))
+        if was_king or promoted:
+            kings |= 1 << end
+        self.kings = kings
+        self.turn = 1 - color
+        return captured
+
+    def unmake_move(self):
+        """Take back the last move played with make_move."""
+        start, end, captured, captured_kings, promoted, key, score = self.history.pop()
+        color = 1 - self.turn
+        moved = (1 << start) ^ (1 << end)
+        if color == RED:
+            self.red ^= moved
+            self.green |= captured
+        else:
+            self.green ^= moved
+            self.red |= captured
+
+        kings = self.kings | captured_kings
+        if kings >> end & 1:
+            kings ^= 1 << end
+            if not promoted:
+                kings |= 1 << start
+        self.kings = kings
+        self.turn = color
+        self.hash = key
+        self.score = score
+
+    def is_game_over(self):
+        return self.analyse()[2]
+
+    def winner(self):
+        """Return the winning color, or None while the side to move can still move."""
+        if not self.analyse()[2]:
+            return None
+        return 1 - self.turn
+
+    def perft(self, depth):
+        """Count the leaf nodes of the move tree depth plies below this position."""
+        if depth == 0:
+            return 1
+        moves = self.generate_moves()
+        if depth == 1:
+            return len(moves)
+        nodes = 0
+        for move in moves:
+            self.make_move(move)
+            nodes += self.perft(depth - 1)
+            self.unmake_move()
+        return nodes
+
+
+# Published perft counts for the standard starting position
+KNOWN_PERFT = {1: 7, 2: 49, 3: 302, 4: 1469, 5: 7361, 6: 36768, 7: 179740, 8: 845931,
+               9: 3963680, 10: 18391564}
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    max_depth = int(sys.argv[1]) if len(sys.argv) > 1 else 7
+    for depth in range(1, max_depth + 1):
+        start = time.perf_counter()
+        nodes = BoardState().perft(depth)
+        elapsed = time.perf_counter() - start
+        expected = KNOWN_PERFT.get(depth)
+        status = "ok" if expected == nodes else f"expected {expected}"
+        print(f"perft({depth}) = {nodes} in {elapsed:.2f}s ({nodes / max(elapsed, 1e-9):.0f} nodes/sec) {status}")
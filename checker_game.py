@@ -1,14 +1,35 @@
+import os
+import queue
+import threading
+import time
 import tkinter
 import tkinter as tk
-import random
-from tkinter import messagebox
+from tkinter import filedialog, messagebox
+from board_state import BoardState, COLOR_NAMES, PositionCache, color_index, iter_bits, rowcol_to_square, square_to_rowcol
+from opening_book import DEFAULT_PATH as OPENING_BOOK_PATH, OpeningBook
+from pdn import PdnGame
+from search import DIFFICULTY_DEPTHS, DIFFICULTY_TIME_BUDGETS, ParallelSearcher, Searcher
+from tablebase import DEFAULT_PATH as TABLEBASE_PATH
+
+AI_POLL_MS = 50  # How often the mainloop checks on a running AI search
+SQUARE_SIZE = 60  # Pixels per board square
+PIECE_MARGIN = 10  # Gap between a piece and the edge of its square
 
 class CheckerGame:
-    def __init__(self, master, player_color, ai_difficulty):
+    def __init__(self, master, player_color, ai_difficulty, tt_size_mb=32, search_workers=1, ponder=False,
+                 tablebase_path=None, opening_book_path=None, show_search_stats=False, log_search_stats=False):
         self.master = master
-        self.pieces = {}  # Tracks pieces by their (row, col) position
+        self.position_cache = PositionCache()  # Legal moves and game status for clicks, hints and the winner check
+        self.state = BoardState(turn=color_index(player_color), cache=self.position_cache)  # Headless position this view renders
+        self.initial_position = self.state.encode()  # Where move_history starts, for the PDN record
+        self.move_history = []  # Every move played this game, in order
         self.selected_piece = None  # Stores the currently selected piece as (row, col)
-        self.board = [[None for _ in range(8)] for _ in range(8)]  # 8x8 board
+        self.pending_path = []  # Squares visited so far by a multi-jump that is still in progress
+        self.canvas = None  # One canvas holds the whole 8x8 board
+        self.square_items = [[None for _ in range(8)] for _ in range(8)]  # Canvas item per square
+        self.piece_items = {}  # Canvas item per piece, keyed by the (row, col) it stands on
+        self.highlighted = set()  # Squares currently coloured as hints
+        self.show_search_stats = show_search_stats  # Statistics of the AI's last search beside the controls
         self.create_board()
         self.red_eliminated = 0  # Initialize red_eliminated counter
         self.green_eliminated = 0  # Initialize green_eliminated counter
@@ -16,13 +37,48 @@ class CheckerGame:
         self.player_color = player_color
         self.ai_color = "green" if player_color == "red" else "red"
         self.ai_difficulty = ai_difficulty
-        self.current_turn = player_color
-        self.difficulty_depths = {'beginner': 2, 'intermediate': 4, 'master': 6}
+        self.difficulty_depths = dict(DIFFICULTY_DEPTHS)
+        self.difficulty_time_budgets = dict(DIFFICULTY_TIME_BUDGETS)  # Milliseconds per move
         self.minimax_depth = self.difficulty_depths[ai_difficulty]
+        self.time_budget_ms = self.difficulty_time_budgets[ai_difficulty]
+        # The opening book is used whenever one has been built (python opening_book.py); book moves skip the search
+        if opening_book_path is None and os.path.exists(OPENING_BOOK_PATH):
+            opening_book_path = OPENING_BOOK_PATH
+        self.opening_book = OpeningBook(opening_book_path) if opening_book_path else None
+        # The endgame tablebase is used whenever one has been generated (python tablebase.py)
+        if tablebase_path is None and os.path.exists(TABLEBASE_PATH):
+            tablebase_path = TABLEBASE_PATH
+        # The searcher keeps its transposition table(s) between AI moves
+        if search_workers > 1:
+            self.searcher = ParallelSearcher(search_workers, tt_size_mb, tablebase_path=tablebase_path)
+        else:
+            self.searcher = Searcher(tt_size_mb, tablebase_path=tablebase_path)
+        self.searcher.log_stats = log_search_stats
+        self.ai_thread = None  # Worker thread running the current AI search, if any
+        self.ai_results = queue.Queue()  # (search id, kind, payload) messages from the worker
+        self.ai_search_id = 0  # Bumped to orphan the results of a cancelled search
+        self.ai_after_id = None  # Pending after() call that will start the AI's turn
+        self.ai_search_started = 0
+        self.ai_progress = ""
+        # Pondering searches the human's likely replies while they think; it needs the serial searcher
+        self.ponder = ponder and isinstance(self.searcher, Searcher)
+        self.ponder_thread = None
+        self.master.protocol("WM_DELETE_WINDOW", self.close)
+
+    @property
+    def pieces(self):
+        # Tracks pieces by their (row, col) position, as seen by the GUI
+        return self.state.pieces()
+
+    @property
+    def current_turn(self):
+        return COLOR_NAMES[self.state.turn]
 
     def create_controls(self):
         hint_button = tk.Button(self.master, text="Show Hints", command=self.show_hints)
-        hint_button.grid(row=9, column=0, columnspan=8, sticky="we")  # Adjust position as needed
+        hint_button.grid(row=9, column=0, columnspan=4, sticky="we")  # Adjust position as needed
+        save_button = tk.Button(self.master, text="Save Game (PDN)", command=self.save_game)
+        save_button.grid(row=9, column=4, columnspan=4, sticky="we")
 
         # Create and place the label for the number of eliminated red pieces
         self.red_eliminated_label = tk.Label(self.master, text=f"Red Eliminated: {self.red_eliminated}")
@@ -32,6 +88,21 @@ class CheckerGame:
         self.green_eliminated_label = tk.Label(self.master, text=f"Green Eliminated: {self.green_eliminated}")
         self.green_eliminated_label.grid(row=10, column=4, columnspan=4, sticky="we")
 
+        move_now_button = tk.Button(self.master, text="Move Now", command=self.move_now)
+        move_now_button.grid(row=11, column=0, columnspan=4, sticky="we")
+        new_game_button = tk.Button(self.master, text="New Game", command=self.new_game)
+        new_game_button.grid(row=11, column=4, columnspan=4, sticky="we")
+
+        # Shows what the AI is doing while it searches
+        self.progress_label = tk.Label(self.master, text="")
+        self.progress_label.grid(row=12, column=0, columnspan=8, sticky="we")
+
+        # Optional statistics of the AI's last search, beside the eliminated counts
+        self.stats_label = None
+        if self.show_search_stats:
+            self.stats_label = tk.Label(self.master, text="", justify="left", anchor="nw", font=("TkFixedFont", 8))
+            self.stats_label.grid(row=9, column=8, rowspan=4, sticky="nw", padx=5)
+
     def update_eliminated_count(self, color):
         if color == "red":
             self.red_eliminated += 1
@@ -40,25 +111,67 @@ class CheckerGame:
             self.green_eliminated += 1
             self.green_eliminated_label.config(text=f"Green Eliminated: {self.green_eliminated}")
 
+    def update_search_stats(self, stats):
+        iterations = ", ".join(f"{ms:.0f}" for ms in stats["iteration_ms"])
+        self.stats_label.config(text=f"Depth: {stats['depth']}\n"
+                                     f"Nodes: {stats['nodes']}\n"
+                                     f"Nodes/s: {stats['nodes_per_second']}\n"
+                                     f"First-move cutoffs: {stats['first_move_cutoff_rate']:.0%}\n"
+                                     f"Branching factor: {stats['branching_factor']:.2f}\n"
+                                     f"TT hits: {stats['tt_hit_rate']:.0%}\n"
+                                     f"Cache hits: {stats['cache_hit_rate']:.0%}\n"
+                                     f"Iterations (ms): {iterations}")
+
     def create_board(self):
+        self.canvas = tk.Canvas(self.master, width=8 * SQUARE_SIZE, height=8 * SQUARE_SIZE, highlightthickness=0)
+        self.canvas.grid(row=0, column=0, rowspan=8, columnspan=8)
+        self.canvas.bind("<Button-1>", self.on_canvas_clicked)
         for i in range(8):
             for j in range(8):
                 color = "white" if (i + j) % 2 == 0 else "black"
-                self.board[i][j] = tk.Canvas(self.master, width=60, height=60, bg=color)
-                self.board[i][j].grid(row=i, column=j)
-                self.board[i][j].bind("<Button-1>", lambda event, row=i, col=j: self.on_square_clicked(row, col))
-                if color == "black" and (i < 3 or i > 4):
-                    piece_color = "red" if i < 3 else "green"
-                    self.draw_piece(i, j, {"color": piece_color, "is_king": False})
+                x, y = j * SQUARE_SIZE, i * SQUARE_SIZE
+                self.square_items[i][j] = self.canvas.create_rectangle(x, y, x + SQUARE_SIZE, y + SQUARE_SIZE,
+                                                                       fill=color, outline="")
+        for (row, col), piece_info in self.pieces.items():
+            self.draw_piece(row, col, piece_info)
+
+    def piece_coords(self, row, col):
+        x, y = col * SQUARE_SIZE, row * SQUARE_SIZE
+        return x + PIECE_MARGIN, y + PIECE_MARGIN, x + SQUARE_SIZE - PIECE_MARGIN, y + SQUARE_SIZE - PIECE_MARGIN
 
     def draw_piece(self, row, col, piece_info):
-        self.board[row][col].delete("all")
+        # Reuse the piece's existing canvas item when there is one
         color = "yellow" if piece_info["is_king"] else piece_info["color"]
-        self.board[row][col].create_oval(10, 10, 50, 50, fill=color, tags=f"piece{row}{col}")
-        self.pieces[(row, col)] = piece_info
+        item = self.piece_items.get((row, col))
+        if item is None:
+            self.piece_items[(row, col)] = self.canvas.create_oval(*self.piece_coords(row, col), fill=color)
+        else:
+            self.canvas.coords(item, *self.piece_coords(row, col))
+            self.canvas.itemconfig(item, fill=color, state="normal")
+
+    def remove_piece(self, row, col):
+        item = self.piece_items.pop((row, col), None)
+        if item is not None:
+            self.canvas.delete(item)
+
+    def sync_board(self):
+        # Bring the piece items in line with the position, e.g. after a new game
+        pieces = self.pieces
+        for row, col in list(self.piece_items):
+            if (row, col) not in pieces:
+                self.remove_piece(row, col)
+        for (row, col), piece_info in pieces.items():
+            self.draw_piece(row, col, piece_info)
+
+    def on_canvas_clicked(self, event):
+        row, col = event.y // SQUARE_SIZE, event.x // SQUARE_SIZE
+        if 0 <= row < 8 and 0 <= col < 8:
+            self.on_square_clicked(row, col)
 
     def on_square_clicked(self, row, col):
-        if (row, col) in self.pieces:
+        if self.current_turn != self.player_color:
+            return  # The AI is moving
+        if (row, col) in self.pieces and not self.pending_path:
             if self.pieces[(row, col)]["color"] == self.current_turn:
                 self.selected_piece = (row, col)
                 return
@@ -68,354 +181,281 @@ class CheckerGame:
                 valid_move, message = self.is_valid_move(self.selected_piece, (row, col))
                 if valid_move:
                     self.move_piece(from_row, from_col, row, col)
-                    self.selected_piece = None
+                    if not self.pending_path:
+                        self.selected_piece = None
                     self.clear_highlights()
                 else:
                     messagebox.showerror("Invalid Move", message)
-                    self.selected_piece = None
+                    if not self.pending_path:
+                        self.selected_piece = None
                     self.clear_highlights()
 
+    def candidate_path(self, from_pos, to_pos):
+        # The squares the selected piece would have visited after moving to to_pos
+        path = self.pending_path or [rowcol_to_square(*from_pos)]
+        return tuple(path) + (rowcol_to_square(*to_pos),)
+
     def is_valid_move(self, from_pos, to_pos):
         from_row, from_col = from_pos
         to_row, to_col = to_pos
         dx = to_row - from_row  # Change in row (direction and magnitude)
         dy = to_col - from_col  # Change in column (must be exactly 1 or 2 for valid moves)
 
-        if (from_pos not in self.pieces) or (to_pos in self.pieces):
+        if rowcol_to_square(to_row, to_col) is None:
+            return False, "Invalid move: Moves must be diagonal and within correct range."
+        if not self.pending_path and ((from_pos not in self.pieces) or (to_pos in self.pieces)):
             return False, "Invalid move: No piece at source or destination not empty."
 
+        path = self.candidate_path(from_pos, to_pos)
+        legal_moves = self.state.legal_moves()
+        if any(move[:len(path)] == path for move in legal_moves):
+            return True, "Valid jump" if abs(dx) == 2 else "Valid move"
+
+        if self.pending_path:
+            return False, "You must continue capturing with the same piece."
+
         piece_info = self.pieces[from_pos]
 
         # Check movement direction for non-king pieces:
         if not piece_info["is_king"]:
-            if piece_info["color"] == "red" and dx < 0:  # Red pieces must move upward (decreasing row index)
+            if piece_info["color"] == "red" and dx < 0:  # Red pieces must move down the board
                 return False, "Red non-king pieces can only move forwards."
-            if piece_info["color"] == "green" and dx > 0:  # Green pieces must move downward (increasing row index)
+            if piece_info["color"] == "green" and dx > 0:  # Green pieces must move up the board
                 return False, "Green non-king pieces can only move forwards."
 
-        # Check if the move is a simple diagonal move
-        if abs(dx) == 1 and abs(dy) == 1:
-            return True, "Valid move"
-
-        # Check if the move is a valid jump
+        if self.state.has_captures():
+            return False, "A capture is available, so you must jump."
         if abs(dx) == 2 and abs(dy) == 2:
-            mid_row, mid_col = (from_row + to_row) // 2, (from_col + to_col) // 2
-            if (mid_row, mid_col) in self.pieces and self.pieces[(mid_row, mid_col)]["color"] != piece_info["color"]:
-                return True, "Valid jump"
-            else:
-                return False, "Invalid jump: No opponent piece to capture."
-
+            return False, "Invalid jump: No opponent piece to capture."
         return False, "Invalid move: Moves must be diagonal and within correct range."
 
     def move_piece(self, from_row, from_col, target_row, target_col):
-        self.board[from_row][from_col].delete("all")
-        piece_info = self.pieces.pop((from_row, from_col))
-
-        # Check if the move is a jump and handle capture
-        if abs(target_row - from_row) == 2:
-            mid_row = (from_row + target_row) // 2
-            mid_col = (from_col + target_col) // 2
-            captured_piece_info = self.pieces.pop((mid_row, mid_col), None)
-            self.board[mid_row][mid_col].delete("all")
-            if captured_piece_info and captured_piece_info["is_king"]:
-                # Crown the capturing piece if it captures a king and is not a king itself
-                piece_info["is_king"] = True
-                # Update eliminated count
-                self.update_eliminated_count(captured_piece_info["color"])
-            elif captured_piece_info:
-                # Update eliminated count
-                self.update_eliminated_count(captured_piece_info["color"])
-
-        # Place the piece in the new location
-        self.pieces[(target_row, target_col)] = piece_info
-        self.draw_piece(target_row, target_col, piece_info)
-
-        # Turn piece into a king if it reaches the opposite end (if not already handled by king capture)
-        if not piece_info["is_king"] and ((piece_info["color"] == "red" and target_row == 7) or
-                                          (piece_info["color"] == "green" and target_row == 0)):
-            piece_info["is_king"] = True
-
-        self.is_game_over()  # Check if the game is over
-        self.switch_turns()  # Switch turns
+        path = self.candidate_path((from_row, from_col), (target_row, target_col))
+        if path in self.state.legal_moves():
+            self.pending_path = []
+            self.execute_move(path)
+            self.switch_turns()  # Switch turns
+            return
+
+        # The jump continues: show the partial capture and wait for the next click.
+        # Items stay keyed by their real squares until the whole move is played.
+        self.pending_path = list(path)
+        self.canvas.coords(self.piece_items[square_to_rowcol(path[0])], *self.piece_coords(target_row, target_col))
+        jumped = ((from_row + target_row) // 2, (from_col + target_col) // 2)
+        self.canvas.itemconfig(self.piece_items[jumped], state="hidden")
+        self.selected_piece = (target_row, target_col)
 
     def must_continue_capturing(self):
-        # Check if the selected piece has further capturing moves available
-        if not self.selected_piece:
-            return False
-        _, possible_jumps = self.get_legal_moves_for_piece(self.selected_piece)
-        return bool(possible_jumps)
+        # Check if the selected piece is in the middle of a multi-jump
+        return bool(self.pending_path)
 
     def ai_move(self):
+        self.ai_after_id = None
         # Get all legal moves for the AI
-        _, jump_moves = self.get_legal_moves(self.ai_color)
-        if jump_moves:
-            move = self.random_move(jump_moves)
-            self.execute_move(move)
-            # Continue capturing if possible
-            self.continue_capturing(move)
-        else:
-            regular_moves, _ = self.get_legal_moves(self.ai_color)
-            if regular_moves:
-                # Use minimax to choose the best move based on the current difficulty level (depth)
-                move = self.minimax_move(regular_moves, self.minimax_depth)
+        moves = self.state.legal_moves()
+        if not moves:
+            self.switch_turns()
+            return
+        book_move = self.opening_book.choose(self.state) if self.opening_book else None
+        if book_move is not None:
+            self.execute_move(book_move)
+            self.switch_turns()
+            return
+        pondered = self.searcher.ponder_results.get(self.state.hash) if self.ponder else None
+        if pondered is not None and pondered[0] in moves:
+            # The human played a reply we already searched: answer straight away
+            self.execute_move(pondered[0])
+            self.switch_turns()
+            return
+        # Search a copy of the position on a worker thread so the window stays responsive
+        self.ai_search_id += 1
+        self.ai_search_started = time.perf_counter()
+        self.ai_progress = ""
+        self.searcher.stop_event.clear()  # Here, not on the worker, so a stop() made before it runs still counts
+        self.ai_thread = threading.Thread(target=self.run_ai_search,
+                                          args=(self.ai_search_id, self.state.copy(), moves), daemon=True)
+        self.ai_thread.start()
+        self.master.after(AI_POLL_MS, self.poll_ai_search)
+
+    def run_ai_search(self, search_id, state, moves):
+        # Runs on the worker thread; only talks to the GUI through self.ai_results
+        def report(depth, move, score):
+            self.ai_results.put((search_id, "progress", (depth, self.searcher.nodes)))
+        self.searcher.on_iteration = report
+        # Captures are searched like any other move, each multi-jump as a single move;
+        # the search deepens until the difficulty level's depth cap or time budget is reached
+        try:
+            move = self.minimax_move(moves, self.minimax_depth, self.time_budget_ms, state)
+        except Exception as error:  # The GUI would otherwise wait for a "done" that never comes
+            self.ai_results.put((search_id, "error", error))
+            return
+        self.ai_results.put((search_id, "done", (move, self.searcher.search_stats())))
+
+    def poll_ai_search(self):
+        if self.ai_thread is None:
+            return  # The search was cancelled
+        while True:
+            try:
+                search_id, kind, payload = self.ai_results.get_nowait()
+            except queue.Empty:
+                break
+            if search_id != self.ai_search_id:
+                continue  # Left over from a cancelled search
+            if kind == "progress":
+                depth, nodes = payload
+                self.ai_progress = f" depth {depth}, {nodes} nodes"
+            elif kind == "error":
+                self.ai_thread = None
+                self.progress_label.config(text="")
+                messagebox.showerror("AI Error", f"The AI search failed: {payload}\nStart a new game to continue.")
+                return
+            else:
+                self.ai_thread = None
+                self.progress_label.config(text="")
+                move, stats = payload
+                if self.stats_label is not None:
+                    self.update_search_stats(stats)
                 self.execute_move(move)
-        self.switch_turns()
+                self.switch_turns()
+                return
+        elapsed = time.perf_counter() - self.ai_search_started
+        self.progress_label.config(text=f"AI is thinking... {elapsed:.1f}s{self.ai_progress}")
+        self.master.after(AI_POLL_MS, self.poll_ai_search)
+
+    def start_pondering(self):
+        # Search the human's replies on the worker thread until they move
+        self.searcher.on_iteration = None
+        self.searcher.stop_event.clear()
+        self.ponder_thread = threading.Thread(target=self.searcher.ponder,
+                                              args=(self.state.copy(), self.minimax_depth, self.time_budget_ms),
+                                              daemon=True)
+        self.ponder_thread.start()
+
+    def stop_pondering(self):
+        if self.ponder_thread is not None:
+            self.searcher.stop()
+            self.ponder_thread.join()
+            self.ponder_thread = None
+
+    def move_now(self):
+        # Make the AI play the best move it has found so far
+        if self.ai_thread is not None:
+            self.searcher.stop()
+
+    def cancel_ai_search(self):
+        self.stop_pondering()
+        if self.ai_after_id is not None:
+            self.master.after_cancel(self.ai_after_id)
+            self.ai_after_id = None
+        if self.ai_thread is not None:
+            self.ai_search_id += 1  # Whatever it still reports is ignored
+            self.searcher.stop()
+            self.ai_thread.join()
+            self.ai_thread = None
+            self.progress_label.config(text="")
+
+    def new_game(self):
+        self.cancel_ai_search()
+        self.state = BoardState(turn=color_index(self.player_color), cache=self.position_cache)
+        self.initial_position = self.state.encode()
+        self.move_history = []
+        self.selected_piece = None
+        self.pending_path = []
+        self.red_eliminated = 0
+        self.green_eliminated = 0
+        self.red_eliminated_label.config(text=f"Red Eliminated: {self.red_eliminated}")
+        self.green_eliminated_label.config(text=f"Green Eliminated: {self.green_eliminated}")
+        self.clear_highlights()
+        self.sync_board()
+
+    def close(self):
+        self.cancel_ai_search()
+        if isinstance(self.searcher, ParallelSearcher):
+            self.searcher.close()
+        self.master.destroy()
 
     def execute_move(self, move):
         """Execute a move on the board."""
-        from_pos, to_pos = move
-        from_row, from_col = from_pos
-        to_row, to_col = to_pos
-
-        # Check if the piece exists at the from position
-        if from_pos not in self.pieces:
-            return
-
-        piece_info = self.pieces.pop(from_pos, None)
-
-        # Handle jumps
-        if abs(to_row - from_row) == 2:
-            mid_row, mid_col = (from_row + to_row) // 2, (from_col + to_col) // 2
-            if (mid_row, mid_col) in self.pieces:
-                captured_piece_info = self.pieces.pop((mid_row, mid_col), None)
-                self.board[mid_row][mid_col].delete("all")
-                # Update eliminated count if a piece was captured
-                if captured_piece_info and captured_piece_info["is_king"]:
-                    # Crown the capturing piece if it captures a king and is not a king itself
-                    piece_info["is_king"] = True
-                    self.update_eliminated_count(captured_piece_info["color"])
-                elif captured_piece_info:
-                    # Update eliminated count
-                    self.update_eliminated_count(captured_piece_info["color"])
-
-        # Move piece to new position and check if the to position is valid
-        if (to_row, to_col) not in self.pieces:
-            self.pieces[to_pos] = piece_info
-            self.board[from_row][from_col].delete("all")
-            self.draw_piece(to_row, to_col, piece_info)
-        else:
-            self.pieces[from_pos] = piece_info  # Restore the piece back to its original position if move failed
-
-        # Check for king promotion
-        if ((piece_info["color"] == "red" and to_row == 7) or (piece_info["color"] == "green" and to_row == 0)) and not \
-                piece_info["is_king"]:
-            piece_info["is_king"] = True
-            self.draw_piece(to_row, to_col, piece_info)
-        # If the move was a multi-step move, pause before proceeding to the next step
-        if abs(to_row - from_row) == 2:
-            self.master.after(1000, lambda: self.continue_capturing(move))
+        mover = self.current_turn
+        captured = self.state.make_move(move)
+        self.move_history.append(move)
+        for sq in iter_bits(captured):
+            self.remove_piece(*square_to_rowcol(sq))
+            self.update_eliminated_count("green" if mover == "red" else "red")
+
+        # Slide the moving piece's item to its new square, recolouring it if it was crowned
+        start, end = square_to_rowcol(move[0]), square_to_rowcol(move[-1])
+        item = self.piece_items.pop(start)
+        self.piece_items[end] = item
+        self.canvas.coords(item, *self.piece_coords(*end))
+        if self.state.kings >> move[-1] & 1:
+            self.canvas.itemconfig(item, fill="yellow")
+
+    def pdn_record(self):
+        """The game so far as a PdnGame."""
+        computer = f"Computer ({self.ai_difficulty})"
+        names = {"red": "Human", "green": computer} if self.player_color == "red" else {"red": computer, "green": "Human"}
+        headers = {"Event": "Checkers", "Date": time.strftime("%Y.%m.%d"), "Black": names["red"], "White": names["green"]}
+        return PdnGame.from_moves(self.move_history, BoardState.decode(self.initial_position), headers)
+
+    def export_pdn(self, path):
+        with open(path, "w") as f:
+            f.write(self.pdn_record().text())
+
+    def save_game(self):
+        path = filedialog.asksaveasfilename(defaultextension=".pdn", filetypes=[("PDN files", "*.pdn")])
+        if path:
+            self.export_pdn(path)
 
     def switch_turns(self):
-        self.current_turn = self.ai_color if self.current_turn == self.player_color else self.player_color
+        # Check if the game is over
+        winner = self.determine_winner()
+        if winner:
+            messagebox.showinfo("Game Over", f"{winner} wins the game!")
+            self.master.quit()  # Quit the game after displaying the winner message
+            return
         if self.current_turn == self.ai_color:
-            self.master.after(500, self.ai_move)
-        else:
-            # Check if the game is over
-            winner = self.determine_winner()
-            if winner:
-                messagebox.showinfo("Game Over", f"{winner} wins the game!")
-                self.master.quit()  # Quit the game after displaying the winner message
-            
-                # No winner yet, continue the game
-                #self.show_hints()  # Show hints for the current player's turn
-
-    def random_move(self, moves):
-        return random.choice(moves)
-
-    def minimax_move(self, moves, depth):
-        best_score = float('-inf')
-        best_move = None
-        alpha = float('-inf')
-        beta = float('inf')
-        for move in moves:
-            self.simulate_move(move)
-            score = self.minimax(depth - 1, False, alpha, beta)
-            self.undo_move()
-            if score > best_score:
-                best_score = score
-                best_move = move
-            alpha = max(alpha, score)  # Update alpha after each minimax call
-        return best_move
-
-    def minimax(self, depth, maximizingPlayer, alpha, beta):
-        if depth == 0 or self.is_game_over():
-            return self.evaluate_board()
-
-        if maximizingPlayer:
-            max_eval = float('-inf')
-            for move in self.get_all_legal_moves(self.ai_color):
-                self.simulate_move(move)
-                eval = self.minimax(depth - 1, False, alpha, beta)
-                self.undo_move()
-                max_eval = max(max_eval, eval)
-                alpha = max(alpha, eval)  # Update alpha
-                if beta <= alpha:
-                    break  # Beta cut-off
-            return max_eval
-        else:
-            min_eval = float('inf')
-            for move in self.get_all_legal_moves(self.player_color):
-                self.simulate_move(move)
-                eval = self.minimax(depth - 1, True, alpha, beta)
-                self.undo_move()
-                min_eval = min(min_eval, eval)
-                beta = min(beta, eval)  # Update beta
-                if beta <= alpha:
-                    break  # Alpha cut-off
-            return min_eval
-
-    def get_legal_moves(self, color):
-        legal_moves = []
-        jump_moves = []
-        for (row, col), piece_info in self.pieces.items():
-            if piece_info["color"] == color:
-                moves, jumps = self.get_legal_moves_for_piece((row, col))
-                legal_moves.extend(moves)
-                jump_moves.extend(jumps)
-        if jump_moves:
-            return [], jump_moves  # Return only jump moves if available
-        return legal_moves, []
-
-    def get_all_legal_moves(self, color):
-        moves = []
-        for pos in self.pieces:
-            if self.pieces[pos] == color:
-                piece_moves = self.get_legal_moves_for_piece(pos)
-                if piece_moves:  # This check is technically redundant now but adds clarity
-                    moves.extend(piece_moves)
-        return moves
-
-    def simulate_move(self, move):
-        """Simulate a move for minimax evaluation, storing state for undo."""
-        from_pos, to_pos = move
-        moved_piece = self.pieces.pop(from_pos)  # Move the piece
-        captured_piece = self.pieces.pop(to_pos, None)  # Capture if applicable
-        self.pieces[to_pos] = moved_piece  # Place at new location
-        # Store state needed to undo this move
-        self.last_simulated_move = (from_pos, to_pos, moved_piece, captured_piece)
-
-    def undo_move(self):
-        """Undo a move after simulation."""
-        if not hasattr(self, 'last_simulated_move'):
-            return  # No move to undo
-        from_pos, to_pos, moved_piece, captured_piece = self.last_simulated_move
-        # Move back the piece
-        self.pieces[from_pos] = moved_piece
-        # Restore captured piece if there was one
-        if captured_piece is not None:
-            self.pieces[to_pos] = captured_piece
-        else:
-            self.pieces.pop(to_pos, None)  # Ensure to_pos is cleared if no capture happened
-
-        del self.last_simulated_move  # Clear the last simulated move
-
-    def check_move(self, row, col, dx, dy):
-        """Checks if a move is legal and returns the target position if it is."""
-        target = (row + dx, col + dy)
-        jump_target = (row + 2 * dx, col + 2 * dy)
-        piece_info = self.pieces[(row, col)]
-
-        # Allow kings to move backwards and forwards
-        if not piece_info['is_king']:
-            if (piece_info['color'] == "red" and dx < 0) or (piece_info['color'] == "green" and dx > 0):
-                return None  # Prevent backward jumps and moves for non-kings
-
-        if 0 <= target[0] < 8 and 0 <= target[1] < 8 and target not in self.pieces:
-            return target  # Regular move
-        elif 0 <= jump_target[0] < 8 and 0 <= jump_target[1] < 8 and jump_target not in self.pieces:
-            mid_target = (row + dx, col + dy)
-            if mid_target in self.pieces and self.pieces[mid_target]['color'] != piece_info['color']:
-                return jump_target  # Jump move
-        return None
-
-    def evaluate_board(self):
-        # Basic evaluation based on piece count
-        ai_pieces = sum(1 for p in self.pieces.values() if p['color'] == self.ai_color)
-        human_pieces = sum(1 for p in self.pieces.values() if p['color'] == self.player_color)
-        return ai_pieces - human_pieces
+            self.stop_pondering()
+            self.ai_after_id = self.master.after(500, self.ai_move)
+        elif self.ponder:
+            self.start_pondering()
+
+    def minimax_move(self, moves, depth, time_ms=None, state=None):
+        return self.searcher.search(state or self.state, depth, time_ms, moves)
 
     def is_game_over(self):
-        if not self.pieces:  # if there are no pieces at all, it's a draw
-            return True
-
-        # Check for any legal moves for each player
-        red_moves, red_jumps = self.get_legal_moves("red")
-        green_moves, green_jumps = self.get_legal_moves("green")
-
-        # Game is over if neither player has any moves
-        red_can_move = red_moves or red_jumps
-        green_can_move = green_moves or green_jumps
-
-        return not red_can_move and not green_can_move
-
-    def get_legal_moves_for_piece(self, pos):
-        row, col = pos
-        piece_info = self.pieces[pos]
-        regular_moves = []
-        jump_moves = []
-        directions = [-1, 1] if piece_info['is_king'] else ([1] if piece_info['color'] == 'red' else [-1])
-
-        for dx in directions:
-            for dy in [-1, 1]:  # Check both diagonal directions
-                new_row, new_col = row + dx, col + dy
-                if 0 <= new_row < 8 and 0 <= new_col < 8:
-                    if (new_row, new_col) not in self.pieces:
-                        regular_moves.append(((row, col), (new_row, new_col)))
-                    jump_row, jump_col = new_row + dx, new_col + dy
-                    if 0 <= jump_row < 8 and 0 <= jump_col < 8 and (jump_row, jump_col) not in self.pieces:
-                        mid_row, mid_col = new_row, new_col
-                        if (mid_row, mid_col) in self.pieces and self.pieces[(mid_row, mid_col)]['color'] != piece_info[
-                            'color']:
-                            jump_moves.append(((row, col), (jump_row, jump_col)))
-
-        return regular_moves, jump_moves
+        return self.state.is_game_over()
 
     def determine_winner(self):
-        red_has_moves = any(self.get_legal_moves_for_piece(pos)
-                            for pos, piece_info in self.pieces.items() if piece_info["color"] == "red")
-        green_has_moves = any(self.get_legal_moves_for_piece(pos)
-                              for pos, piece_info in self.pieces.items() if piece_info["color"] == "green")
-
-        if not red_has_moves:
-            return "Green"
-        elif not green_has_moves:
-            return "Red"
-        return None  # No winner yet
+        winner = self.state.winner()
+        if winner is None:
+            return None  # No winner yet
+        return COLOR_NAMES[winner].capitalize()
 
     def highlight_moves(self, moves):
         # Resetting the color of all squares first
-        for row in range(8):
-            for col in range(8):
-                if (row + col) % 2 == 1:  # Only black squares
-                    self.board[row][col].config(bg="black")
+        self.clear_highlights()
 
-        # Highlighting the squares based on the provided moves list
-        for from_pos, to_pos in moves:
-            _, to_col = to_pos
-            self.board[_][to_col].config(bg="lightgreen")  # Use light green for visibility
+        # Highlighting the next square each move lands on
+        step = max(len(self.pending_path), 1)
+        for move in moves:
+            row, col = square_to_rowcol(move[step])
+            self.canvas.itemconfig(self.square_items[row][col], fill="lightgreen")  # Use light green for visibility
+            self.highlighted.add((row, col))
 
     def show_hints(self):
         # Clear any previous highlights
         self.clear_highlights()
-        # Fetch the legal moves for the current player's turn
-        _, possible_moves = self.get_legal_moves(self.current_turn)
+        # Fetch the legal moves for the current player's turn, continuing any jump in progress
+        prefix = tuple(self.pending_path)
+        possible_moves = [move for move in self.state.legal_moves() if move[:len(prefix)] == prefix]
         # Highlight these moves
         self.highlight_moves(possible_moves)
 
     def clear_highlights(self):
-        for row in range(8):
-            for col in range(8):
-                if (row + col) % 2 == 1:  # Only black squares need color reset
-                    self.board[row][col].config(bg="black")
-
-    def continue_capturing(self, move):
-        from_pos, to_pos = move
-        to_row, to_col = to_pos
-        _, further_jumps = self.get_legal_moves_for_piece(to_pos)
-        while further_jumps:
-            move = self.random_move(further_jumps)
-            self.execute_move(move)
-            _, further_jumps = self.get_legal_moves_for_piece(to_pos) if to_pos in self.pieces else ([], [])
+        for row, col in self.highlighted:  # Only highlighted squares need their color reset
+            self.canvas.itemconfig(self.square_items[row][col], fill="black")
+        self.highlighted.clear()
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -0,0 +1,195 @@
+"""Local engine service: many clients, one pool of search processes.
+
+Clients connect over TCP and send one JSON request per line; every request
+gets one JSON response line carrying the same "id". Requests on a single
+connection may be pipelined, and responses come back as searches finish.
+
+    {"id": 1, "fen": "B:W21,22,23:B1,2,3", "time_ms": 500, "game": "table-7"}
+    {"id": 1, "move": "2-6", "score": 35, "depth": 9, "nodes": 18342}
+
+The position is either "fen" (as in a PDN FEN tag) or "position", the
+[red, green, kings, turn] list from BoardState.encode(). "depth" is
+optional, and "timeout_ms" overrides the default per-request timeout.
+{"op": "ping"} and {"op": "stats"} report on the service itself.
+
+Each worker is a single process with its own Searcher, so its
+transposition table stays warm between requests. Requests naming the same
+"game" always go to the same worker; the others go to the least busy one.
+Once max_pending searches are in flight, the service stops reading from
+clients until one finishes, which pushes back through TCP.
+
+    python engine_service.py --port 8765 --workers 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+from board_state import BoardState
+from pdn import check_position, move_text, parse_fen
+from search import MAX_DEPTH, init_worker, worker_searcher
+
+DEFAULT_TIME_MS = 1000
+MAX_TIME_MS = 60_000
+TIMEOUT_GRACE_MS = 1000  # Allowed on top of a request's time budget before it times out
+
+
+def _search(encoded_state, depth, time_ms):
+    searcher = worker_searcher()
+    state = BoardState.decode(encoded_state)
+    move = searcher.search(state, depth, time_ms)
+    return move, searcher.best_score if searcher.depth_reached else None, searcher.depth_reached, searcher.nodes
+
+
+class EngineService:
+    """asyncio front end that hands searches to single-process workers."""
+
+    def __init__(self, workers=None, max_pending=256, tt_size_mb=64, tablebase_path=None):
+        count = workers or os.cpu_count() or 1
+        self.workers = [ProcessPoolExecutor(1, initializer=init_worker,
+                                            initargs=(tt_size_mb, None, None, tablebase_path)) for _ in range(count)]
+        for worker in self.workers:
+            # Start the processes now: forked later, they would inherit client sockets and keep them open
+            worker.submit(os.getpid).result()
+        self.busy = [0] * count  # Searches queued or running per worker
+        self.slots = asyncio.Semaphore(max_pending)
+        self.max_pending = max_pending
+        self.served = 0
+        self.timeouts = 0
+        self.server = None
+
+    def _pick_worker(self, game):
+        if game is not None:
+            return zlib.crc32(str(game).encode()) % len(self.workers)
+        return min(range(len(self.workers)), key=self.busy.__getitem__)
+
+    def _finished(self, worker):
+        self.busy[worker] -= 1
+
+    async def search(self, request):
+        """Answer one search request; the caller holds a slot."""
+        if "fen" in request:
+            state = parse_fen(request["fen"])
+        elif "position" in request:
+            position = tuple(request["position"])
+            if len(position) != 4:
+                raise ValueError("position must be [red, green, kings, turn]")
+            check_position(*position)
+            state = BoardState.decode(position)
+        else:
+            raise ValueError("request needs a fen or a position")
+        time_ms = min(int(request.get("time_ms", DEFAULT_TIME_MS)), MAX_TIME_MS)
+        depth = min(int(request.get("depth", MAX_DEPTH)), MAX_DEPTH)
+        timeout_ms = int(request.get("timeout_ms", time_ms + TIMEOUT_GRACE_MS))
+        time_ms = min(time_ms, timeout_ms)  # A search cannot be cancelled once it runs, so it must end by itself
+
+        worker = self._pick_worker(request.get("game"))
+        loop = asyncio.get_running_loop()
+        self.busy[worker] += 1
+        future = self.workers[worker].submit(_search, state.encode(), depth, time_ms)
+        # The worker stays busy until the search really ends, not when the client stops waiting
+        future.add_done_callback(lambda _: loop.is_closed() or loop.call_soon_threadsafe(self._finished, worker))
+        try:
+            move, score, depth_reached, nodes = await asyncio.wait_for(asyncio.wrap_future(future), timeout_ms / 1000)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        self.served += 1
+        return {"move": move_text(move) if move else None, "score": score, "depth": depth_reached, "nodes": nodes}
+
+    def stats(self):
+        return {"workers": len(self.workers), "busy": list(self.busy), "max_pending": self.max_pending,
+                "served": self.served, "timeouts": self.timeouts}
+
+    async def _answer(self, request, writer, lock):
+        try:
+            response = await self.search(request)
+        except asyncio.TimeoutError:
+            response = {"error": "timeout"}
+        except Exception as error:  # Every request gets its line, or the client waits on its id forever
+            response = {"error": str(error) or type(error).__name__}
+        finally:
+            self.slots.release()
+        await self._send(writer, lock, dict(response, id=request.get("id")))
+
+    async def _send(self, writer, lock, response):
+        async with lock:  # Whole lines only, even with several answers finishing together
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+
+    async def handle_client(self, reader, writer):
+        lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("request must be a JSON object")
+                except ValueError as error:
+                    await self._send(writer, lock, {"error": f"bad request: {error}"})
+                    continue
+                op = request.get("op", "search")
+                if op != "search":
+                    if op == "ping":
+                        response = {"pong": True}
+                    elif op == "stats":
+                        response = self.stats()
+                    else:
+                        response = {"error": f"unknown op {op!r}"}
+                    await self._send(writer, lock, dict(response, id=request.get("id")))
+                    continue
+                # Not reading on until there is a slot is the backpressure: unread requests stay in TCP buffers
+                await self.slots.acquire()
+                task = asyncio.create_task(self._answer(request, writer, lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        except ConnectionError:
+            pass  # The client went away; its searches finish and are dropped
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8765):
+        self.server = await asyncio.start_server(self.handle_client, host, port)
+        async with self.server:
+            await self.server.serve_forever()
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+        for worker in self.workers:
+            worker.shutdown(wait=False, cancel_futures=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve engine searches to many local clients.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--max-pending", type=int, default=256, help="searches in flight before clients are held back")
+    parser.add_argument("--tt-size-mb", type=int, default=64, help="transposition table size per worker")
+    parser.add_argument("--tablebase", help="endgame tablebase file for the workers to probe")
+    args = parser.parse_args(argv)
+
+    async def run():
+        service = EngineService(args.workers, args.max_pending, args.tt_size_mb, args.tablebase)
+        try:
+            await service.serve(args.host, args.port)
+        finally:
+            service.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -6,11 +6,13 @@ class SetupWindow(tk.Tk):
     def __init__(self):
         super().__init__()
         self.title("Checkers Game Setup")
-        self.geometry("400x300")
+        self.geometry("400x370")
 
         # Initialize configuration variables with default values
         self.color_var = tk.StringVar(self, value="red")
         self.difficulty_var = tk.StringVar(self, value="beginner")
+        self.ponder_var = tk.BooleanVar(self, value=False)
+        self.stats_var = tk.BooleanVar(self, value=False)
 
         frame = tk.Frame(self)
         frame.pack(pady=10)
@@ -23,6 +25,12 @@ class SetupWindow(tk.Tk):
         difficulty_menu = tk.OptionMenu(frame, self.difficulty_var, "beginner", "intermediate", "master")
         difficulty_menu.pack(fill="x", padx=5, pady=5)
 
+        ponder_check = tk.Checkbutton(frame, text="Let the AI think during your turn", variable=self.ponder_var)
+        ponder_check.pack(fill="x", padx=5, pady=5)
+
+        stats_check = tk.Checkbutton(frame, text="Show search statistics", variable=self.stats_var)
+        stats_check.pack(fill="x", padx=5)
+
         start_button = tk.Button(frame, text="Start Game", command=self.start_game)
         start_button.pack(pady=10)
 
@@ -34,7 +42,8 @@ class SetupWindow(tk.Tk):
         rules_button.pack(pady=5)
 
     def start_game(self):
-        game_window = GameWindow(self.color_var.get(), self.difficulty_var.get())
+        game_window = GameWindow(self.color_var.get(), self.difficulty_var.get(), self.ponder_var.get(),
+                                 self.stats_var.get())
         game_window.mainloop()
         self.destroy()
 
@@ -81,10 +90,10 @@ class SetupWindow(tk.Tk):
         close_button.pack(pady=10)
 
 class GameWindow(tk.Tk):
-    def __init__(self, player_color, ai_difficulty):
+    def __init__(self, player_color, ai_difficulty, ponder=False, show_search_stats=False):
         super().__init__()
         self.title("Checkers")
-        self.game = CheckerGame(self, player_color, ai_difficulty)
+        self.game = CheckerGame(self, player_color, ai_difficulty, ponder=ponder, show_search_stats=show_search_stats)
 
 if __name__ == "__main__":
     setup_window = SetupWindow()
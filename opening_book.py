@@ -0,0 +1,125 @@
+"""Opening book: built offline from deep searches, probed with a binary search over an mmap.
+
+The book file is a header followed by fixed-size (position hash, from square,
+to square, weight) records sorted by hash. A position's moves sit next to
+each other, and a move is matched against the legal moves by its first and
+last squares.
+"""
+import argparse
+import mmap
+import os
+import random
+import struct
+import time
+
+from board_state import GREEN, RED, BoardState
+from search import Searcher
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "openings.ckob")
+MAGIC = b"CKOB"
+VERSION = 1
+HEADER = struct.Struct("<4sHI")  # magic, version, record count
+RECORD = struct.Struct("<QBBH")  # position hash, from square, to square, weight
+
+
+def build(plies=8, depth=10, time_ms=1000, margin=20, log=print):
+    """Return {position hash: [(move, weight), ...]} for positions within plies of the start.
+
+    Every legal move of a book position is searched on its own; moves scoring
+    within margin of the best one are kept, weighted by how close they come,
+    and the positions they lead to are expanded in turn.
+    """
+    searcher = Searcher()
+    book = {}
+    frontier = [BoardState(turn=RED), BoardState(turn=GREEN)]  # The game lets either colour open
+    for ply in range(plies):
+        started = time.perf_counter()
+        next_frontier = []
+        for state in frontier:
+            moves = state.legal_moves()
+            if not moves or state.hash in book:
+                continue
+            if len(moves) == 1:
+                scored = [(0, moves[0])]
+            else:
+                scored = []
+                for move in moves:
+                    searcher.deepen(state, [move], depth, time_ms)
+                    scored.append((searcher.best_score, move))
+            best = max(score for score, _ in scored)
+            entries = [(move, margin + 1 - (best - score)) for score, move in scored if best - score <= margin]
+            book[state.hash] = entries
+            for move, _ in entries:
+                child = state.copy()
+                child.make_move(move)
+                next_frontier.append(child)
+        frontier = next_frontier
+        log(f"ply {ply + 1}: {len(book)} positions, {time.perf_counter() - started:.1f}s")
+    return book
+
+
+def write(book, path):
+    records = sorted((key, move[0], move[-1], weight) for key, entries in book.items() for move, weight in entries)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(records)))
+        for record in records:
+            f.write(RECORD.pack(*record))
+
+
+class OpeningBook:
+    """Read-only, memory-mapped view of an opening book file."""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.file = open(path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} opening book")
+
+    def _record(self, i):
+        return RECORD.unpack_from(self.data, HEADER.size + i * RECORD.size)
+
+    def entries(self, key):
+        """Return [(from square, to square, weight)] stored for a position hash."""
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._record(middle)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        entries = []
+        for i in range(low, self.count):
+            record_key, start, end, weight = self._record(i)
+            if record_key != key:
+                break
+            entries.append((start, end, weight))
+        return entries
+
+    def choose(self, state, rng=random):
+        """Return a book move for state, picked at random by weight, or None when out of book."""
+        moves = state.legal_moves()
+        candidates = []
+        for start, end, weight in self.entries(state.hash):
+            for move in moves:
+                if move[0] == start and move[-1] == end:
+                    candidates.append((move, weight))
+                    break
+        if not candidates:
+            return None
+        return rng.choices([move for move, _ in candidates], [weight for _, weight in candidates])[0]
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a checkers opening book from deep searches.")
+    parser.add_argument("--plies", type=int, default=8, help="how many plies from the start the book covers")
+    parser.add_argument("--depth", type=int, default=10, help="search depth for each candidate move")
+    parser.add_argument("--time-ms", type=int, default=1000, help="time limit for each candidate move")
+    parser.add_argument("--margin", type=int, default=20, help="keep moves scoring this close to the best")
+    parser.add_argument("--output", default=DEFAULT_PATH)
+    args = parser.parse_args()
+    write(build(args.plies, args.depth, args.time_ms, args.margin), args.output)
@@ -0,0 +1,304 @@
+"""PDN (Portable Draughts Notation) game records: writing, streaming reading and batch analysis.
+
+Squares use the standard 1-32 numbering (BoardState square + 1). Red is
+PDN's Black and moves first from the standard start; a game that starts any
+other way carries a FEN tag. Results are "1-0" for a red win, "0-1" for a
+green win, "1/2-1/2" for a draw and "*" for an unfinished game.
+
+    python pdn.py games.pdn --output scores.jsonl --workers 8 --time-ms 500
+"""
+import argparse
+import json
+import os
+import re
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from board_state import GREEN, GREEN_START, RED, RED_START, BoardState, iter_bits
+from search import MAX_DEPTH, init_worker, worker_searcher
+
+RESULTS = {RED: "1-0", GREEN: "0-1", None: "*"}
+RESULT_TOKENS = ("1-0", "0-1", "1/2-1/2", "2-0", "0-2", "1-1", "0-0", "*")
+TAG = re.compile(r'\[(\w+)\s+"((?:[^"\\]|\\.)*)"\]')
+COMMENT = re.compile(r"\{[^}]*\}")
+VARIATION = re.compile(r"\([^()]*\)")  # Innermost only; removed repeatedly to unwind nesting
+BRACKET = re.compile(r"[{}()]")
+# With comments and variations gone, movetext is NAGs, move numbers, moves and the result
+MOVETEXT_TOKEN = re.compile(r"\$\d+|\d+\.(?:\.\.)?|(?:1/2-1/2|[012]-[012])(?![0-9x-])|[0-9]+(?:[-x][0-9]+)+|\*")
+
+
+def move_text(move):
+    """Standard numeric notation: squares 1-32, "-" for a step and "x" between jumps."""
+    separator = "x" if abs(move[1] - move[0]) > 5 else "-"
+    return separator.join(str(sq + 1) for sq in move)
+
+
+def parse_move(text, state):
+    """Return the legal move of state that text describes, or raise ValueError.
+
+    A capture may list every square it lands on or just its first and last.
+    """
+    squares = [int(part) - 1 for part in re.split(r"[-x]", text)]
+    for move in state.legal_moves():
+        if move[0] != squares[0] or move[-1] != squares[-1]:
+            continue
+        landings = iter(move[1:])
+        if all(square in landings for square in squares[1:]):
+            return move
+    raise ValueError(f"illegal move {text}")
+
+
+def fen(state):
+    """FEN tag value for a position, e.g. "B:W21,22,K30:B1,2,3"."""
+    def squares(bitboard):
+        return ",".join(("K" if state.kings >> sq & 1 else "") + str(sq + 1) for sq in iter_bits(bitboard))
+    return f"{'B' if state.turn == RED else 'W'}:W{squares(state.green)}:B{squares(state.red)}"
+
+
+def check_position(red, green, kings, turn):
+    """Raise ValueError unless the bitboards and turn describe a board BoardState can hold."""
+    for bitboard in (red, green, kings):
+        if not isinstance(bitboard, int) or not 0 <= bitboard < 1 << 32:
+            raise ValueError(f"bitboard {bitboard!r} is not 32 squares")
+    if red & green:
+        raise ValueError("a square holds both colours")
+    if not red | green:
+        raise ValueError("no pieces on the board")
+    if kings & ~(red | green):
+        raise ValueError("a king on an empty square")
+    if turn not in (RED, GREEN):
+        raise ValueError(f"bad side to move {turn!r}")
+
+
+def parse_fen(text):
+    """Return the BoardState a FEN tag value describes, or raise ValueError."""
+    fields = text.strip().rstrip(".").split(":")
+    side = fields[0].strip().upper()
+    if side not in ("B", "W"):
+        raise ValueError(f"FEN {text!r} does not start with the side to move, B or W")
+    red = green = kings = 0
+    for field in fields[1:]:
+        field = field.strip()
+        if not field:
+            continue
+        color, listed = field[0].upper(), field[1:]
+        if color not in ("B", "W"):
+            raise ValueError(f"FEN field {field!r} is not a list of B or W pieces")
+        for item in filter(None, (part.strip() for part in listed.split(","))):
+            is_king = item[0].upper() == "K"
+            if is_king:
+                item = item[1:]
+            low, _, high = item.partition("-")  # Some tools write ranges such as 1-12
+            for number in range(int(low), int(high or low) + 1):
+                if not 1 <= number <= 32:
+                    raise ValueError(f"no square {number} in FEN {text!r}")
+                bit = 1 << (number - 1)
+                if (red | green) & bit:
+                    raise ValueError(f"square {number} listed twice in FEN {text!r}")
+                if color == "B":
+                    red |= bit
+                else:
+                    green |= bit
+                if is_king:
+                    kings |= bit
+    turn = RED if side == "B" else GREEN
+    check_position(red, green, kings, turn)
+    return BoardState(red, green, kings, turn)
+
+
+class PdnGame:
+    """One game read from or written to PDN: its tags and its moves as text."""
+
+    def __init__(self, headers=None, moves=None, result="*"):
+        self.headers = dict(headers or {})
+        self.moves = list(moves or [])
+        self.result = result
+
+    @classmethod
+    def from_moves(cls, moves, start=None, headers=None):
+        """Record played move tuples; start is the position they were played from."""
+        start = start.copy() if start is not None else BoardState()
+        headers = dict(headers or {})
+        if (start.red, start.green, start.kings, start.turn) != (RED_START, GREEN_START, 0, RED):
+            headers["SetUp"] = "1"
+            headers["FEN"] = fen(start)
+        state = start
+        texts = []
+        for move in moves:
+            texts.append(move_text(move))
+            state.make_move(move)
+        winner = state.winner()
+        result = RESULTS[winner]
+        headers["Result"] = result
+        return cls(headers, texts, result)
+
+    def start(self):
+        return parse_fen(self.headers["FEN"]) if "FEN" in self.headers else BoardState()
+
+    def positions(self):
+        """Yield (position, move) for every move, the position being the one the move is played in.
+
+        The same BoardState object is yielded each time, then updated.
+        """
+        state = self.start()
+        for text in self.moves:
+            move = parse_move(text, state)
+            yield state, move
+            state.make_move(move)
+
+    def text(self):
+        lines = [f'[{name} "{value}"]' for name, value in self.headers.items()]
+        if "Result" not in self.headers:
+            lines.append(f'[Result "{self.result}"]')
+        tokens = []
+        number = 1
+        black_to_move = self.start().turn == RED
+        if not black_to_move:
+            tokens.append("1...")
+        for text in self.moves:
+            if black_to_move:
+                tokens.append(f"{number}.")
+            else:
+                number += 1
+            tokens.append(text)
+            black_to_move = not black_to_move
+        tokens.append(self.result)
+        movetext, line = [], ""
+        for token in tokens:  # Wrap the movetext at 80 columns
+            if line and len(line) + 1 + len(token) > 80:
+                movetext.append(line)
+                line = token
+            else:
+                line = f"{line} {token}" if line else token
+        movetext.append(line)
+        return "\n".join(lines) + "\n\n" + "\n".join(movetext) + "\n"
+
+
+def _parse_movetext(headers, movetext):
+    moves = []
+    result = headers.get("Result", "*")
+    movetext = COMMENT.sub(" ", movetext)
+    removed = 1
+    while removed:
+        movetext, removed = VARIATION.subn(" ", movetext)
+    for token in MOVETEXT_TOKEN.findall(movetext):
+        if token[0] == "$" or token.endswith("."):
+            continue
+        if token in RESULT_TOKENS:
+            result = token
+        else:
+            moves.append(token)
+    return PdnGame(headers, moves, result)
+
+
+def read_games(lines):
+    """Yield a PdnGame per game in an iterable of lines (an open file), holding one game at a time.
+
+    Brackets inside a comment do not count towards variation nesting:
+
+    >>> lines = ['[Event "a"]', '', '9-13 {odd (bracket} 22-18 *', '', '[Event "b"]', '', '9-14 *']
+    >>> [(game.headers["Event"], game.moves) for game in read_games(lines)]
+    [('a', ['9-13', '22-18']), ('b', ['9-14'])]
+
+    A tag block after a blank line starts a new game, even if the last one had no moves:
+
+    >>> lines = ['[Event "c"]', '', '[Event "d"]', '', '10-14 *']
+    >>> [(game.headers["Event"], game.moves) for game in read_games(lines)]
+    [('c', []), ('d', ['10-14'])]
+    """
+    headers, movetext = {}, []
+    in_comment = False  # Comments and variations may span lines
+    variations = 0  # Nesting of variations outside comments
+    tags_done = False  # A blank line or movetext has followed the current game's tags
+    for line in lines:
+        stripped = line.strip()
+        if not in_comment and not variations and stripped.startswith("["):
+            if movetext or (headers and tags_done):
+                yield _parse_movetext(headers, " ".join(movetext))
+                headers, movetext = {}, []
+            tags_done = False
+            for name, value in TAG.findall(stripped):
+                headers[name] = value.replace('\\"', '"')
+            continue
+        tags_done = True
+        if stripped:
+            movetext.append(stripped)
+            for bracket in BRACKET.findall(stripped):
+                if in_comment:
+                    in_comment = bracket != "}"
+                elif bracket == "{":
+                    in_comment = True
+                elif bracket == "(":
+                    variations += 1
+                elif bracket == ")" and variations:
+                    variations -= 1
+    if headers or movetext:
+        yield _parse_movetext(headers, " ".join(movetext))
+
+
+def analyse_game(game, depth=MAX_DEPTH, time_ms=1000):
+    """Search every position of a game; scores are from the side to move's point of view.
+
+    Each move gets the best move and score found, and the score of the move
+    actually played. A score is None when not even one ply finished in time.
+    """
+    searcher = worker_searcher()
+    analysis = []
+    try:
+        for ply, (state, move) in enumerate(game.positions()):
+            moves = state.legal_moves()
+            if len(moves) == 1:
+                analysis.append({"ply": ply, "move": move_text(move), "forced": True})
+                continue
+            best = searcher.search(state, depth, time_ms, moves)
+            best_depth = searcher.depth_reached
+            best_score = searcher.best_score if best_depth else None
+            played_score = best_score
+            if move != best:
+                # The played move searched alone, to the depth the full search reached
+                searcher.deepen(state, [move], best_depth or depth, time_ms)
+                played_score = searcher.best_score if searcher.depth_reached else None
+            analysis.append({"ply": ply, "move": move_text(move), "score": played_score,
+                             "best": move_text(best), "best_score": best_score, "depth": best_depth})
+    except ValueError as error:
+        return {"moves": analysis, "error": str(error)}
+    return {"moves": analysis}
+
+
+def analyse_file(path, output, workers=None, depth=MAX_DEPTH, time_ms=1000, tt_size_mb=64):
+    """Analyse every game of a PDN file across worker processes, writing a JSON line per game.
+
+    Games are read lazily and at most a few per worker are in flight, so
+    memory stays flat however large the file is. Lines come out in file order.
+    """
+    workers = workers or os.cpu_count() or 1
+    pending = deque()
+    with open(path, encoding="utf-8", errors="replace") as games, open(output, "w") as out, \
+            ProcessPoolExecutor(workers, initializer=init_worker, initargs=(tt_size_mb,)) as pool:
+        def write_oldest():
+            number, headers, future = pending.popleft()
+            out.write(json.dumps(dict(future.result(), game=number, headers=headers)) + "\n")
+
+        for number, game in enumerate(read_games(games)):
+            pending.append((number, game.headers, pool.submit(analyse_game, game, depth, time_ms)))
+            if len(pending) >= 2 * workers:
+                write_oldest()
+        while pending:
+            write_oldest()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score every move of the games in a PDN file.")
+    parser.add_argument("pdn", help="PDN file to analyse")
+    parser.add_argument("--output", default="analysis.jsonl", help="JSON Lines file, one line per game")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--depth", type=int, default=MAX_DEPTH)
+    parser.add_argument("--time-ms", type=int, default=1000, help="time limit per position")
+    args = parser.parse_args(argv)
+    analyse_file(args.pdn, args.output, args.workers, args.depth, args.time_ms)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
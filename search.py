@@ -0,0 +1,651 @@
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from board_state import DEFAULT_TABLES, JUMPED_SQUARE, BoardState, build_piece_square_tables
+from tablebase import LOSS, WIN, Tablebase
+
+INFINITY = 1_000_000
+MAX_DEPTH = 64
+MAX_PLY = 128  # Killer-move slots; deeper plies simply go without
+WIN_SCORE = 10_000  # Score for winning at the root; shorter wins score higher
+WIN_BOUND = WIN_SCORE - 1_000  # Scores beyond this are wins or losses, not evaluations
+
+# Difficulty levels offered by the game: depth cap and time budget (milliseconds) per move
+DIFFICULTY_DEPTHS = {'beginner': 2, 'intermediate': 4, 'master': MAX_DEPTH}
+DIFFICULTY_TIME_BUDGETS = {'beginner': 500, 'intermediate': 1000, 'master': 2000}
+
+logger = logging.getLogger(__name__)  # One "search {json}" line per move when Searcher.log_stats is set
+
+# Kinds of score a transposition table entry holds
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+
+def _pack_move(move):
+    # Squares 5 bits each above a 4-bit square count; 0 is no move. Twelve squares fill
+    # the 64 bits, and a longer capture chain is simply not kept.
+    if move is None or len(move) > 12:
+        return 0
+    code = 0
+    for sq in reversed(move):
+        code = code << 5 | sq
+    return code << 4 | len(move)
+
+
+def _unpack_move(code):
+    if not code:
+        return None
+    length = code & 15
+    code >>= 4
+    return tuple(code >> 5 * i & 31 for i in range(length))
+
+
+class TranspositionTable:
+    """Fixed-size hash table of search results keyed by Zobrist hash.
+
+    Entries live in buckets of two slots. The first slot keeps the deepest
+    result seen for the bucket; the second is overwritten by every store that
+    does not replace the first, so recent shallow results still get cached.
+    Everything is kept in flat arrays, so the memory used is exactly what
+    the size asks for.
+    """
+
+    SLOT_BYTES = 22  # Key 8, depth 1, flag 1, score 4 and packed move 8 bytes
+
+    def __init__(self, size_mb=16):
+        self.buckets = max(1, int(size_mb * 2 ** 20) // (2 * self.SLOT_BYTES))
+        self.probes = 0  # Lookups and successful lookups, for the search statistics
+        self.hits = 0
+        self.clear()
+
+    def clear(self):
+        slots = 2 * self.buckets
+        self.keys = array("Q", bytes(8 * slots))
+        self.depths = array("b", [-1]) * slots
+        self.flags = array("B", bytes(slots))
+        self.scores = array("i", bytes(4 * slots))
+        self.moves = array("Q", bytes(8 * slots))
+
+    def probe(self, key):
+        """Return (depth, flag, score, move) stored for key, or None."""
+        slot = (key % self.buckets) * 2
+        self.probes += 1
+        for index in (slot, slot + 1):
+            if self.keys[index] == key and self.depths[index] >= 0:
+                self.hits += 1
+                return self.depths[index], self.flags[index], self.scores[index], _unpack_move(self.moves[index])
+        return None
+
+    def store(self, key, depth, flag, score, move):
+        slot = (key % self.buckets) * 2
+        if self.keys[slot] != key and depth < self.depths[slot]:
+            slot += 1  # Keep the deeper entry, fall back to the always-replace slot
+        self.keys[slot] = key
+        self.depths[slot] = depth
+        self.flags[slot] = flag
+        self.scores[slot] = score
+        self.moves[slot] = _pack_move(move)
+
+
+def _rate(part, whole):
+    return part / whole if whole else 0.0
+
+
+def _trim_zeros(counts):
+    end = len(counts)
+    while end and not counts[end - 1]:
+        end -= 1
+    return counts[:end]
+
+
+def _branching_factor(iteration_nodes):
+    # Growth in nodes from the second-last to the last completed iteration
+    if len(iteration_nodes) < 2 or not iteration_nodes[-2]:
+        return 0.0
+    return round(iteration_nodes[-1] / iteration_nodes[-2], 2)
+
+
+def merge_stats(parts, seconds):
+    """Combine the search_stats() of searches that ran side by side for seconds."""
+    merged = {"depth": min((part["depth"] for part in parts), default=0), "seconds": round(seconds, 4)}
+    for key in ("nodes", "quiescence_nodes", "cutoffs", "first_move_cutoffs", "tt_probes", "tt_hits",
+                "cache_lookups", "cache_hits", "tablebase_hits"):
+        merged[key] = sum(part[key] for part in parts)
+    width = max((len(part["nodes_per_ply"]) for part in parts), default=0)
+    merged["nodes_per_ply"] = [sum(part["nodes_per_ply"][i] for part in parts if i < len(part["nodes_per_ply"]))
+                               for i in range(width)]
+    # Only iterations every search completed; the searches ran at the same time
+    width = min((len(part["iteration_nodes"]) for part in parts), default=0)
+    merged["iteration_nodes"] = [sum(part["iteration_nodes"][i] for part in parts) for i in range(width)]
+    merged["iteration_ms"] = [max(part["iteration_ms"][i] for part in parts) for i in range(width)]
+    merged["nodes_per_second"] = round(merged["nodes"] / seconds) if seconds else 0
+    merged["first_move_cutoff_rate"] = round(_rate(merged["first_move_cutoffs"], merged["cutoffs"]), 4)
+    merged["tt_hit_rate"] = round(_rate(merged["tt_hits"], merged["tt_probes"]), 4)
+    merged["cache_hit_rate"] = round(_rate(merged["cache_hits"], merged["cache_lookups"]), 4)
+    merged["branching_factor"] = _branching_factor(merged["iteration_nodes"])
+    return merged
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when its time budget has run out or it was told to stop."""
+
+
+def _score_to_table(score, ply):
+    # Win/loss scores are stored relative to the node, not the root
+    if score > WIN_BOUND:
+        return score + ply
+    if score < -WIN_BOUND:
+        return score - ply
+    return score
+
+
+def _score_from_table(score, ply):
+    if score > WIN_BOUND:
+        return score - ply
+    if score < -WIN_BOUND:
+        return score + ply
+    return score
+
+
+class Searcher:
+    """Alpha-beta (negamax) search over BoardState positions.
+
+    The transposition table is kept between searches, so positions analysed
+    for one move are reused for the next.
+    """
+
+    def __init__(self, tt_size_mb=16, weights=None, verify_eval=False, cache_entries=50_000, tablebase_path=None):
+        self.tt = TranspositionTable(tt_size_mb)
+        self.tablebase = Tablebase(tablebase_path) if tablebase_path else None
+        self.tablebase_pieces = self.tablebase.max_pieces if self.tablebase else 0
+        self.tablebase_hits = 0  # Positions scored exactly by the tablebase in the last search
+        # Hash -> BoardState.analyse() result for this searcher alone. Unlike the GUI's
+        # PositionCache it takes no lock and keeps no LRU order; it is emptied when full.
+        self.move_cache = {}
+        self.cache_entries = cache_entries
+        self.ponder_results = {}  # Position hash -> (move, depth) found while pondering
+        self.tables = build_piece_square_tables(weights) if weights else DEFAULT_TABLES
+        self.verify_eval = verify_eval  # Check the incremental evaluation against a full rescan
+        self.stop_event = threading.Event()  # Set from another thread to end the search early
+        self.on_iteration = None  # Called as on_iteration(depth, move, score) after each iteration
+        self.deadline = None
+        self.nodes = 0
+        self.quiescence_nodes = 0  # Nodes searched past the nominal depth
+        self.depth_reached = 0  # Deepest iteration the last search completed
+        self.best_score = 0
+        self.iterations = []
+        # Move ordering state: two killer moves per ply and a history score
+        # per (color, from, to) for quiet moves that caused cut-offs
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        self.history_scores = [[0] * 1024, [0] * 1024]
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        # Statistics of the last search; see search_stats()
+        self.log_stats = False  # Log search_stats() after every search() call
+        self.ply_nodes = [0] * MAX_PLY  # Depth plus capture chains never gets this deep
+        self.iteration_marks = []  # (nodes, seconds) at the end of each completed iteration
+        self.started = 0.0
+        self.elapsed = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @property
+    def first_move_cutoff_rate(self):
+        """Share of cut-offs produced by the first move searched; near 1.0 means good ordering."""
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    def _reset_stats(self, state):
+        self.nodes = self.quiescence_nodes = self.tablebase_hits = 0
+        self.cutoffs = self.first_move_cutoffs = 0
+        self.ply_nodes = [0] * MAX_PLY
+        self.iteration_marks = []
+        self.tt.probes = self.tt.hits = 0
+        self.cache_hits = self.cache_misses = 0
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def search_stats(self):
+        """Return what the last search did as a JSON-friendly dict.
+
+        Per-iteration lists are in iteration order.
+        """
+        cache_hits = self.cache_hits
+        cache_lookups = cache_hits + self.cache_misses
+        iteration_nodes, iteration_ms = [], []
+        previous_nodes, previous_seconds = 0, 0.0
+        for nodes, seconds in self.iteration_marks:
+            iteration_nodes.append(nodes - previous_nodes)
+            iteration_ms.append(round((seconds - previous_seconds) * 1000, 1))
+            previous_nodes, previous_seconds = nodes, seconds
+        return {
+            "depth": self.depth_reached,
+            "nodes": self.nodes,
+            "quiescence_nodes": self.quiescence_nodes,
+            "nodes_per_ply": _trim_zeros(self.ply_nodes),
+            "seconds": round(self.elapsed, 4),
+            "nodes_per_second": round(self.nodes / self.elapsed) if self.elapsed else 0,
+            "cutoffs": self.cutoffs,
+            "first_move_cutoffs": self.first_move_cutoffs,
+            "first_move_cutoff_rate": round(self.first_move_cutoff_rate, 4),
+            "branching_factor": _branching_factor(iteration_nodes),
+            "tt_probes": self.tt.probes,
+            "tt_hits": self.tt.hits,
+            "tt_hit_rate": round(_rate(self.tt.hits, self.tt.probes), 4),
+            "cache_lookups": cache_lookups,
+            "cache_hits": cache_hits,
+            "cache_hit_rate": round(_rate(cache_hits, cache_lookups), 4),
+            "tablebase_hits": self.tablebase_hits,
+            "iteration_nodes": iteration_nodes,
+            "iteration_ms": iteration_ms,
+        }
+
+    def order_moves(self, state, moves, tt_move, ply, depth=MAX_DEPTH):
+        """Sort moves in place: table move, captures by value, killers, then history score.
+
+        Just above the leaves only the table move and killers are brought
+        forward; a full history sort there costs more than it saves.
+        """
+        if abs(moves[0][1] - moves[0][0]) > 5:
+            # Captures are compulsory, so either every move captures or none does
+            kings = state.kings
+
+            def capture_value(move):
+                value = 0
+                for a, b in zip(move, move[1:]):
+                    value += 3 if kings >> JUMPED_SQUARE[a, b] & 1 else 1
+                return value
+            moves.sort(key=capture_value, reverse=True)
+        elif depth < 2:
+            if ply < MAX_PLY:
+                for killer in reversed(self.killers[ply]):
+                    if killer is not None and killer in moves:
+                        moves.remove(killer)
+                        moves.insert(0, killer)
+        else:
+            killers = self.killers[ply] if ply < MAX_PLY else (None, None)
+            history = self.history_scores[state.turn]
+
+            def quiet_value(move):
+                if move == killers[0]:
+                    return 1 << 30
+                if move == killers[1]:
+                    return 1 << 29
+                return history[move[0] << 5 | move[1]]
+            moves.sort(key=quiet_value, reverse=True)
+        if tt_move is not None and tt_move in moves:
+            moves.remove(tt_move)
+            moves.insert(0, tt_move)
+
+    def _record_cutoff(self, state, move, depth, ply, index):
+        self.cutoffs += 1
+        if index == 0:
+            self.first_move_cutoffs += 1
+        if abs(move[1] - move[0]) > 5 or ply >= MAX_PLY:
+            return
+        killers = self.killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        self.history_scores[state.turn][move[0] << 5 | move[1]] += depth * depth
+
+    def stop(self):
+        """Ask a running search to finish now with the best move found so far.
+
+        The request stands until stop_event is cleared, which whoever starts
+        the next search does before handing it to another thread.
+        """
+        self.stop_event.set()
+
+    def _check_time(self):
+        if self.stop_event.is_set() or (self.deadline is not None and time.perf_counter() > self.deadline):
+            raise SearchTimeout
+
+    def probe_tablebase(self, state, ply):
+        """Return the exact score of a position the endgame tablebase covers, or None."""
+        if (state.red | state.green).bit_count() > self.tablebase_pieces:
+            return None
+        entry = self.tablebase.probe(state)
+        if entry is None:
+            return None
+        self.tablebase_hits += 1
+        result, distance = entry
+        if result == WIN:
+            return WIN_SCORE - ply - distance
+        if result == LOSS:
+            return -WIN_SCORE + ply + distance
+        return 0
+
+    def analyse(self, state):
+        """BoardState.analyse() through the searcher's own move cache."""
+        entry = self.move_cache.get(state.hash)
+        if entry is not None:
+            self.cache_hits += 1
+            return entry
+        self.cache_misses += 1
+        if len(self.move_cache) >= self.cache_entries:
+            self.move_cache.clear()
+        entry = self.move_cache[state.hash] = state.generate_analysis()
+        return entry
+
+    def evaluate(self, state):
+        # Weighted material and position, kept up to date by make/unmake
+        if self.verify_eval and state.score != state.compute_score():
+            raise AssertionError(f"incremental evaluation {state.score} != rescan {state.compute_score()}")
+        return state.evaluation()
+
+    def search(self, state, max_depth=MAX_DEPTH, time_ms=None, moves=None):
+        """Return the best move for the side to move, deepening one ply at a time.
+
+        Each iteration searches the previous iteration's best move first. If
+        time_ms runs out or stop() is called mid-iteration, that iteration is
+        abandoned and the best move of the last completed one is returned.
+        """
+        moves = list(moves or state.legal_moves())
+        if len(moves) <= 1:
+            self._reset_stats(state)
+            self.depth_reached = self.best_score = 0
+            self.iterations = []
+            move = moves[0] if moves else None  # Nothing to think about
+        else:
+            move = self.deepen(state, moves, max_depth, time_ms)
+        if self.log_stats:
+            logger.info("search %s", json.dumps(self.search_stats()))
+        return move
+
+    def ponder(self, state, max_depth=MAX_DEPTH, time_ms=None):
+        """Search the opponent's replies in state before they are played.
+
+        Replies are taken most likely first (table move, then the usual move
+        ordering). For each one, the answer found with the same depth and time
+        limits as a real move is stored in self.ponder_results under the hash
+        of the position after the reply. Everything searched also lands in
+        the transposition table. Runs until every reply is done or stop() is
+        called; a reply interrupted by stop() is not recorded.
+        """
+        self.ponder_results = {}
+        replies = state.legal_moves()
+        if not replies:
+            return self.ponder_results
+        entry = self.tt.probe(state.hash)
+        self.order_moves(state, replies, entry[3] if entry else None, 0)
+        for reply in replies:
+            if self.stop_event.is_set():
+                break
+            state.make_move(reply)
+            moves = state.legal_moves()
+            if len(moves) == 1:
+                self.ponder_results[state.hash] = (moves[0], 0)
+            elif moves:
+                move = self.deepen(state, moves, max_depth, time_ms)
+                if not self.stop_event.is_set():
+                    self.ponder_results[state.hash] = (move, self.depth_reached)
+            state.unmake_move()
+        return self.ponder_results
+
+    def deepen(self, state, moves, max_depth=MAX_DEPTH, time_ms=None):
+        """Run the iterative deepening loop over the given root moves.
+
+        self.iterations records (depth, best move, score) for every iteration
+        that completed; best_score stays 0 when none did.
+        """
+        moves = list(moves)
+        if state.tables is not self.tables:
+            state.use_tables(self.tables)
+        self.deadline = None if time_ms is None else time.perf_counter() + time_ms / 1000
+        self._reset_stats(state)
+        self.depth_reached = self.best_score = 0
+        self.iterations = []
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        for table in self.history_scores:
+            for i, value in enumerate(table):
+                table[i] = value >> 1  # Age the history so old games fade out
+
+        entry = self.tt.probe(state.hash)
+        self.order_moves(state, moves, entry[3] if entry else None, 0)
+        best_move = moves[0]
+        full_root = len(moves) == len(state.legal_moves())
+        history_length = len(state.history)
+        for depth in range(1, max_depth + 1):
+            try:
+                move, score = self._search_root(state, depth, moves, full_root)
+            except SearchTimeout:
+                while len(state.history) > history_length:
+                    state.unmake_move()  # Unwind the moves the interrupted search left made
+                break
+            best_move, self.best_score, self.depth_reached = move, score, depth
+            self.iterations.append((depth, move, score))
+            self.iteration_marks.append((self.nodes, time.perf_counter() - self.started))
+            if self.on_iteration is not None:
+                self.on_iteration(depth, move, score)
+            moves.remove(move)
+            moves.insert(0, move)
+            if abs(score) > WIN_BOUND:
+                break  # A forced win or loss will not change with more depth
+        self.deadline = None
+        self.elapsed = time.perf_counter() - self.started
+        return best_move
+
+    def _search_root(self, state, depth, moves, full_root=True):
+        best_move = None
+        alpha = -INFINITY
+        for move in moves:
+            state.make_move(move)
+            score = -self.negamax(state, depth - 1, -INFINITY, -alpha, 1)
+            state.unmake_move()
+            if best_move is None or score > alpha:
+                alpha = score
+                best_move = move
+        if full_root:
+            # The best of only some root moves is not the value of the position, so it is not stored
+            self.tt.store(state.hash, depth, EXACT, _score_to_table(alpha, 0), best_move)
+        return best_move, alpha
+
+    def negamax(self, state, depth, alpha, beta, ply):
+        self.nodes += 1
+        self.ply_nodes[ply] += 1
+        if not self.nodes & 1023:
+            self._check_time()
+        if self.tablebase_pieces:
+            score = self.probe_tablebase(state, ply)
+            if score is not None:
+                return score
+
+        entry = self.tt.probe(state.hash)
+        tt_move = None
+        if entry is not None:
+            entry_depth, flag, score, tt_move = entry
+            if entry_depth >= depth:
+                score = _score_from_table(score, ply)
+                if flag == EXACT:
+                    return score
+                if flag == LOWER_BOUND and score >= beta:
+                    return score
+                if flag == UPPER_BOUND and score <= alpha:
+                    return score
+
+        if depth <= 0:
+            return self.quiescence(state, alpha, beta, ply)
+        moves, _, game_over = self.analyse(state)
+        if game_over:
+            return -WIN_SCORE + ply  # The side to move is blocked or has no pieces left
+        if len(moves) > 1:
+            moves = list(moves)
+            self.order_moves(state, moves, tt_move, ply, depth)
+
+        original_alpha = alpha
+        best_score = -INFINITY
+        best_move = None
+        for index, move in enumerate(moves):
+            state.make_move(move)
+            score = -self.negamax(state, depth - 1, -beta, -alpha, ply + 1)
+            state.unmake_move()
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        self._record_cutoff(state, move, depth, ply, index)
+                        break  # Cut-off: the opponent will avoid this line
+
+        if best_score <= original_alpha:
+            flag = UPPER_BOUND
+        elif best_score >= beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        self.tt.store(state.hash, depth, flag, _score_to_table(best_score, ply), best_move)
+        return best_score
+
+    def quiescence(self, state, alpha, beta, ply):
+        """Search on past the nominal depth while the side to move has captures.
+
+        Captures are compulsory, so a position with one pending is never
+        scored as it stands; each capture chain is a single atomic move.
+        """
+        self.nodes += 1
+        self.quiescence_nodes += 1
+        self.ply_nodes[ply] += 1
+        if not self.nodes & 1023:
+            self._check_time()
+        if self.tablebase_pieces:
+            score = self.probe_tablebase(state, ply)
+            if score is not None:
+                return score
+
+        moves, captures, game_over = self.analyse(state)
+        if not captures:
+            return -WIN_SCORE + ply if game_over else self.evaluate(state)
+        if len(moves) > 1:
+            moves = list(moves)
+            self.order_moves(state, moves, None, ply)
+        best_score = -INFINITY
+        for move in moves:
+            state.make_move(move)
+            score = -self.quiescence(state, -beta, -alpha, ply + 1)
+            state.unmake_move()
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return best_score
+
+
+_worker_searcher = None  # Each pool process keeps its own searcher and table warm
+
+
+def init_worker(tt_size_mb=16, weights=None, stop_event=None, tablebase_path=None):
+    """Process pool initializer giving the process the searcher worker_searcher() returns."""
+    global _worker_searcher
+    _worker_searcher = Searcher(tt_size_mb, weights, tablebase_path=tablebase_path)
+    if stop_event is not None:
+        _worker_searcher.stop_event = stop_event  # Lets the parent stop every worker at once
+
+
+def worker_searcher():
+    """The searcher of this pool process, or a fresh one outside a pool."""
+    return _worker_searcher or Searcher()
+
+
+def _search_root_moves(encoded_state, moves, max_depth, time_ms):
+    state = BoardState.decode(encoded_state)
+    searcher = _worker_searcher
+    searcher.deepen(state, moves, max_depth, time_ms)
+    return searcher.iterations, searcher.search_stats()
+
+
+class ParallelSearcher:
+    """Root-splitting search across a pool of worker processes.
+
+    The root moves are dealt out round-robin, each worker deepens over its
+    share, and the results are merged at the deepest iteration every worker
+    completed, ties going to the earlier root move. Workers get the position
+    as BoardState.encode() output, never the GUI-bound objects.
+    """
+
+    def __init__(self, workers=None, tt_size_mb=16, weights=None, tablebase_path=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.stop_event = multiprocessing.Event()  # Shared with every worker
+        # Each worker maps the tablebase file itself; the pages are shared through the OS
+        self.pool = ProcessPoolExecutor(self.workers, initializer=init_worker,
+                                        initargs=(tt_size_mb, weights, self.stop_event, tablebase_path))
+        # Start the processes now rather than on the first search, from the GUI's AI thread
+        for future in [self.pool.submit(os.getpid) for _ in range(self.workers)]:
+            future.result()
+        self.on_iteration = None
+        self.nodes = 0
+        self.depth_reached = 0
+        self.best_score = 0
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.log_stats = False
+        self.stats = merge_stats([], 0.0)
+
+    @property
+    def first_move_cutoff_rate(self):
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    def search_stats(self):
+        """Statistics of the last search, summed over the workers (see merge_stats)."""
+        return self.stats
+
+    def search(self, state, max_depth=MAX_DEPTH, time_ms=None, moves=None):
+        """Same contract as Searcher.search, with the root moves searched in parallel."""
+        moves = list(moves or state.legal_moves())
+        self.nodes = self.depth_reached = self.cutoffs = self.first_move_cutoffs = 0
+        self.stats = merge_stats([], 0.0)
+        if len(moves) <= 1:
+            move = moves[0] if moves else None
+        else:
+            move = self._search_shares(state, moves, max_depth, time_ms)
+        if self.log_stats:
+            logger.info("search %s", json.dumps(self.stats))
+        return move
+
+    def _search_shares(self, state, moves, max_depth, time_ms):
+        started = time.perf_counter()
+        encoded = state.encode()
+        shares = [moves[i::self.workers] for i in range(min(self.workers, len(moves)))]
+        futures = [self.pool.submit(_search_root_moves, encoded, share, max_depth, time_ms) for share in shares]
+        results = []
+        parts = []
+        for future in futures:
+            iterations, stats = future.result()
+            results.append(iterations)
+            parts.append(stats)
+        self.stats = merge_stats(parts, time.perf_counter() - started)
+        self.nodes = self.stats["nodes"]
+        self.cutoffs = self.stats["cutoffs"]
+        self.first_move_cutoffs = self.stats["first_move_cutoffs"]
+
+        # A share that stopped early on a proven result keeps its last iteration
+        unproven = [len(r) for r in results if r and abs(r[-1][2]) <= WIN_BOUND]
+        depth = min(unproven) if unproven else max(len(r) for r in results)
+        self.stats["depth"] = depth
+        if depth == 0:
+            return moves[0]  # No worker finished even one ply in time
+        candidates = []
+        for iterations in results:
+            if iterations:
+                _, move, score = iterations[min(depth, len(iterations)) - 1]
+                candidates.append((score, -moves.index(move), move))
+        self.best_score, _, best_move = max(candidates)
+        self.depth_reached = depth
+        if self.on_iteration is not None:
+            self.on_iteration(depth, best_move, self.best_score)
+        return best_move
+
+    def stop(self):
+        self.stop_event.set()
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,340 @@
+"""Endgame tablebases: offline retrograde generation and mmap-backed probing.
+
+Positions are stored with red to move; a green-to-move position is probed
+through its mirror image (board turned 180 degrees, colours swapped). They
+are grouped into slices by material (red kings, red men, green kings, green
+men), and each slice is indexed by a collision-free combinatorial index.
+Every position takes one byte: 0 for a draw, 1 + n for a loss in n plies,
+128 + n for a win in n plies, always from the side to move's point of view.
+"""
+import argparse
+import mmap
+import os
+import struct
+import time
+from array import array
+from collections import defaultdict
+from itertools import combinations
+from math import comb
+
+from board_state import DOWN_DIRECTIONS, GREEN, KING_DIRECTIONS, NEIGHBOUR, RED, BoardState, iter_bits
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "endgames.cktb")
+MAGIC = b"CKTB"
+VERSION = 1
+HEADER = struct.Struct("<4sHHI")  # magic, version, max pieces, slice count
+SLICE_ENTRY = struct.Struct("<4BQQ")  # red kings, red men, green kings, green men, offset, size
+
+DRAW = 0
+WIN = 1
+LOSS = 2
+MAX_DISTANCE = 126
+
+MEN_SQUARES = 28  # Men never stand on their own crowning row
+GREEN_MEN_OFFSET = 4  # Green men live on squares 4..31, red men on 0..27
+
+
+def _reverse_byte(value):
+    return int(f"{value:08b}"[::-1], 2)
+
+
+_REVERSED_BYTES = bytes(_reverse_byte(value) for value in range(256))
+
+
+def _reverse32(bitboard):
+    return (_REVERSED_BYTES[bitboard & 0xFF] << 24 | _REVERSED_BYTES[bitboard >> 8 & 0xFF] << 16
+            | _REVERSED_BYTES[bitboard >> 16 & 0xFF] << 8 | _REVERSED_BYTES[bitboard >> 24])
+
+
+def mirror(red, green, kings):
+    """Turn the board 180 degrees and swap colours: the same game with the other side to move."""
+    return _reverse32(green), _reverse32(red), _reverse32(kings)
+
+
+def canonical(state):
+    """Return the position's bitboards with red to move, mirroring a green-to-move position."""
+    if state.turn == RED:
+        return state.red, state.green, state.kings
+    return mirror(state.red, state.green, state.kings)
+
+
+def material(red, green, kings):
+    return ((red & kings).bit_count(), (red & ~kings).bit_count(),
+            (green & kings).bit_count(), (green & ~kings).bit_count())
+
+
+def slice_size(counts):
+    red_kings, red_men, green_kings, green_men = counts
+    free = 32 - red_men - green_men
+    return (comb(MEN_SQUARES, red_men) * comb(MEN_SQUARES, green_men)
+            * comb(free, red_kings) * comb(free - red_kings, green_kings))
+
+
+def _colex_rank(positions):
+    # positions ascending; the rank of the set among all sets of its size
+    rank = 0
+    for i, position in enumerate(positions):
+        rank += comb(position, i + 1)
+    return rank
+
+
+def _compressed(bitboard, taken):
+    # Positions of bitboard's squares once the squares in taken are removed from the board
+    return [sq - (taken & ((1 << sq) - 1)).bit_count() for sq in iter_bits(bitboard)]
+
+
+def position_index(red, green, kings, counts):
+    """Index of a red-to-move position within its material slice."""
+    red_kings_count, red_men_count, green_kings_count, green_men_count = counts
+    red_men, green_men = red & ~kings, green & ~kings
+    men = red_men | green_men
+    red_kings = red & kings
+    free = 32 - red_men_count - green_men_count
+    index = _colex_rank(list(iter_bits(red_men)))
+    index = index * comb(MEN_SQUARES, green_men_count) + _colex_rank(
+        [sq - GREEN_MEN_OFFSET for sq in iter_bits(green_men)])
+    index = index * comb(free, red_kings_count) + _colex_rank(_compressed(red_kings, men))
+    index = index * comb(free - red_kings_count, green_kings_count) + _colex_rank(
+        _compressed(green & kings, men | red_kings))
+    return index
+
+
+def encode_value(result, distance):
+    distance = min(distance, MAX_DISTANCE)
+    if result == WIN:
+        return 128 + distance
+    if result == LOSS:
+        return 1 + distance
+    return 0
+
+
+def decode_value(value):
+    """Return (result, distance in plies) for a stored byte."""
+    if value >= 128:
+        return WIN, value - 128
+    if value:
+        return LOSS, value - 1
+    return DRAW, 0
+
+
+def material_slices(max_pieces):
+    """Every material slice with both sides on the board and at most max_pieces pieces."""
+    slices = []
+    for total in range(2, max_pieces + 1):
+        for red_kings in range(total + 1):
+            for red_men in range(total + 1 - red_kings):
+                for green_kings in range(total + 1 - red_kings - red_men):
+                    green_men = total - red_kings - red_men - green_kings
+                    if red_kings + red_men and green_kings + green_men:
+                        slices.append((red_kings, red_men, green_kings, green_men))
+    return slices
+
+
+_colex_cache = {}
+
+
+def _colex_combinations(n, k):
+    # All k-subsets of range(n), in colex order so that list position == _colex_rank
+    key = (n, k)
+    if key not in _colex_cache:
+        _colex_cache[key] = sorted(combinations(range(n), k), key=lambda c: c[::-1])
+    return _colex_cache[key]
+
+
+def enumerate_slice(counts):
+    """Yield (index, red, green, kings) for every valid position of a slice."""
+    red_kings_count, red_men_count, green_kings_count, green_men_count = counts
+    free_count = 32 - red_men_count - green_men_count
+    green_men_sets = _colex_combinations(MEN_SQUARES, green_men_count)
+    red_king_sets = _colex_combinations(free_count, red_kings_count)
+    green_king_sets = _colex_combinations(free_count - red_kings_count, green_kings_count)
+    index = 0
+    for red_men_set in _colex_combinations(MEN_SQUARES, red_men_count):
+        red_men = sum(1 << sq for sq in red_men_set)
+        for green_men_set in green_men_sets:
+            green_men = sum(1 << (p + GREEN_MEN_OFFSET) for p in green_men_set)
+            block = len(red_king_sets) * len(green_king_sets)
+            if red_men & green_men:
+                index += block  # Overlapping men: a hole in the index
+                continue
+            men = red_men | green_men
+            free = [sq for sq in range(32) if not men >> sq & 1]
+            for red_king_set in red_king_sets:
+                red_kings = sum(1 << free[p] for p in red_king_set)
+                rest = [sq for sq in free if not red_kings >> sq & 1]
+                for green_king_set in green_king_sets:
+                    green_kings = sum(1 << rest[p] for p in green_king_set)
+                    yield index, red_men | red_kings, green_men | green_kings, red_kings | green_kings
+                    index += 1
+
+
+class _Group:
+    """Slices solved together: same piece count and king count, closed under quiet moves."""
+
+    def __init__(self, slices):
+        self.offsets = {}
+        size = 0
+        for counts in slices:
+            self.offsets[counts] = size
+            size += slice_size(counts)
+        self.size = size
+        self.values = bytearray(size)
+        self.resolved = bytearray(size)
+        self.remaining = array("H", [0]) * size  # Children that might still not be won for the opponent
+        self.longest_win = bytearray(size)  # Longest win among the children found so far
+        self.boards = array("Q", [0]) * size  # red | green << 32 for each index
+        self.kings = array("L", [0]) * size
+
+
+def _solve_group(group, solved, state):
+    buckets = defaultdict(list)
+
+    def lookup(red, green, kings):
+        counts = material(red, green, kings)
+        if counts in group.offsets:
+            return counts, None
+        return counts, solved[counts][position_index(red, green, kings, counts)]
+
+    for counts, offset in group.offsets.items():
+        for index, red, green, kings in enumerate_slice(counts):
+            g = offset + index
+            group.boards[g] = red | green << 32
+            group.kings[g] = kings
+            state.red, state.green, state.kings, state.turn = red, green, kings, RED
+            moves = state.generate_moves()
+            if not moves:
+                buckets[0].append((g, LOSS))
+                continue
+            best_win = None
+            for move in moves:
+                state.make_move(move)
+                child = canonical(state)  # The position as green faces it
+                state.unmake_move()
+                if not child[0]:
+                    best_win = 1  # Took the last piece
+                    continue
+                child_counts, value = lookup(*child)
+                if value is None:
+                    group.remaining[g] += 1
+                    continue
+                result, distance = decode_value(value)
+                if result == LOSS:
+                    best_win = distance + 1 if best_win is None else min(best_win, distance + 1)
+                elif result == WIN:
+                    group.longest_win[g] = max(group.longest_win[g], distance)
+                else:
+                    group.remaining[g] += 1  # A drawn child means this can never be lost
+            if best_win is not None:
+                group.remaining[g] += 1  # Already has a winning move, so it is never lost
+                buckets[best_win].append((g, WIN))
+            elif not group.remaining[g]:
+                buckets[group.longest_win[g] + 1].append((g, LOSS))
+
+    distance = 0
+    while buckets:
+        for g, result in buckets.pop(distance, ()):
+            if group.resolved[g]:
+                continue
+            group.resolved[g] = 1
+            group.values[g] = encode_value(result, distance)
+            for p in _predecessors(group, g, state):
+                if group.resolved[p]:
+                    continue
+                if result == LOSS:
+                    buckets[distance + 1].append((p, WIN))
+                else:
+                    group.longest_win[p] = max(group.longest_win[p], min(distance, 255))
+                    group.remaining[p] -= 1
+                    if not group.remaining[p]:
+                        buckets[group.longest_win[p] + 1].append((p, LOSS))
+        distance += 1
+
+
+def _predecessors(group, g, state):
+    # In-group positions one quiet green move before g, as indexes in the group.
+    # g is stored red to move, so the move that led to it was green's.
+    board = group.boards[g]
+    red, green, kings = board & 0xFFFFFFFF, board >> 32, group.kings[g]
+    empty = ~(red | green) & 0xFFFFFFFF
+    for sq in iter_bits(green):
+        is_king = kings >> sq & 1
+        # Green men move up the board, so they arrived from below
+        for d in (KING_DIRECTIONS if is_king else DOWN_DIRECTIONS):
+            origin = NEIGHBOUR[d][sq]
+            if origin < 0 or not empty >> origin & 1:
+                continue
+            moved = (1 << sq) | (1 << origin)
+            before_kings = kings ^ moved if is_king else kings
+            state.red, state.green, state.kings, state.turn = red, green ^ moved, before_kings, GREEN
+            if state.jumpers():
+                continue  # Green would have had to capture instead
+            parent = mirror(red, green ^ moved, before_kings)
+            counts = material(*parent)
+            yield group.offsets[counts] + position_index(*parent, counts)
+
+
+def generate(max_pieces, path, log=print):
+    """Solve every slice with up to max_pieces pieces and write the table to path."""
+    solved = {}
+    state = BoardState(0, 0, 0)
+    slices = material_slices(max_pieces)
+    for total in range(2, max_pieces + 1):
+        # Promotion adds a king, so groups with more kings are solved first
+        for king_count in range(total, -1, -1):
+            members = [s for s in slices if sum(s) == total and s[0] + s[2] == king_count]
+            if not members:
+                continue
+            started = time.perf_counter()
+            group = _Group(members)
+            _solve_group(group, solved, state)
+            for counts, offset in group.offsets.items():
+                solved[counts] = bytes(group.values[offset:offset + slice_size(counts)])
+            log(f"{total} pieces, {king_count} kings: {group.size} positions "
+                f"in {time.perf_counter() - started:.1f}s")
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, max_pieces, len(slices)))
+        offset = HEADER.size + SLICE_ENTRY.size * len(slices)
+        for counts in slices:
+            f.write(SLICE_ENTRY.pack(*counts, offset, len(solved[counts])))
+            offset += len(solved[counts])
+        for counts in slices:
+            f.write(solved[counts])
+
+
+class Tablebase:
+    """Read-only, memory-mapped view of a generated tablebase file."""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.file = open(path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.max_pieces, count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} checkers tablebase")
+        self.slices = {}
+        for i in range(count):
+            *counts, offset, size = SLICE_ENTRY.unpack_from(self.data, HEADER.size + i * SLICE_ENTRY.size)
+            self.slices[tuple(counts)] = offset
+
+    def probe(self, state):
+        """Return (result, distance) for the side to move, or None if the position is not covered."""
+        if (state.red | state.green).bit_count() > self.max_pieces:
+            return None
+        red, green, kings = canonical(state)
+        counts = material(red, green, kings)
+        offset = self.slices.get(counts)
+        if offset is None:
+            return None
+        return decode_value(self.data[offset + position_index(red, green, kings, counts)])
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a checkers endgame tablebase.")
+    parser.add_argument("--pieces", type=int, default=4, help="largest number of pieces on the board")
+    parser.add_argument("--output", default=DEFAULT_PATH)
+    args = parser.parse_args()
+    generate(args.pieces, args.output)